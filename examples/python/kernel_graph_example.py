@@ -22,13 +22,36 @@ sys.path.insert(0, build_dir)
 
 import stillwater_kpu as kpu
 
+# The DataType enum is small and fixed, so resolve every name once at import
+_DTYPE_NAMES = {dt: kpu.dtype_name(dt) for dt in kpu.DataType.__members__.values()}
+
+def _format_separator(title: str) -> str:
+    """Build the separator line for a section title"""
+    if title:
+        return f"=== {title} {'=' * (55 - len(title))}"
+    return "=" * 60
+
+# Section titles are all literals, so their separators are built once at import
+_SEP_CACHE = {
+    title: _format_separator(title)
+    for title in (
+        "",
+        "Kernel Creation",
+        "Kernel Compiler",
+        "Kernel Graph (Multi-Kernel DAG)",
+        "Diamond Graph Pattern",
+        "Concurrent Executor",
+        "Example Complete",
+    )
+}
+
 def print_separator(title: str = ""):
     """Print a section separator"""
+    separator = _SEP_CACHE.get(title)
+    if separator is None:
+        separator = _format_separator(title)
     print()
-    if title:
-        print(f"=== {title} {'=' * (55 - len(title))}")
-    else:
-        print("=" * 60)
+    print(separator)
     print()
 
 def demo_kernel_creation():
@@ -64,7 +87,7 @@ def demo_kernel_creation():
     print("Kernel arguments:")
     for arg in mlp.arguments():
         output = "(output)" if arg.is_output else ""
-        print(f"  {arg.name}: shape={list(arg.shape)}, dtype={kpu.dtype_name(arg.dtype)} {output}")
+        print(f"  {arg.name}: shape={list(arg.shape)}, dtype={_DTYPE_NAMES[arg.dtype]} {output}")
 
 def demo_kernel_compiler():
     """Demonstrate the kernel compiler"""
@@ -118,62 +141,58 @@ def demo_kernel_graph():
     print("Creating a two-layer MLP graph...")
     graph = kpu.KernelGraph("two_layer_mlp")
 
-    # Add layer 1: matmul + ReLU
-    layer1 = graph.add_kernel(
-        kpu.Kernel.create_mlp(64, 512, 256, kpu.ActivationType.RELU, True),
-        "fc1_relu"
-    )
-
-    # Add layer 2: matmul (no activation, final output)
-    layer2 = graph.add_kernel(
-        kpu.Kernel.create_mlp(64, 128, 512, kpu.ActivationType.NONE, True),
-        "fc2"
-    )
+    # Add both layers in a single call:
+    #   layer 1: matmul + ReLU
+    #   layer 2: matmul (no activation, final output)
+    layer1, layer2 = graph.add_kernels([
+        (kpu.Kernel.create_mlp(64, 512, 256, kpu.ActivationType.RELU, True), "fc1_relu"),
+        (kpu.Kernel.create_mlp(64, 128, 512, kpu.ActivationType.NONE, True), "fc2"),
+    ])
 
     # Connect layers: output of fc1 -> input of fc2
-    graph.add_edge(layer1, layer2, "C", "A")
+    graph.add_edges([(layer1, layer2, "C", "A")])
 
     # Print graph info
+    # Resolve kernel names once rather than on every printed line
+    name_of = {nid: graph.get_kernel(nid).name() for nid in graph.node_ids()}
+
     print(f"  Graph name: {graph.name}")
     print(f"  Nodes: {graph.num_nodes()}")
     print(f"  Edges: {graph.num_edges()}")
     print()
 
-    # Validate the graph
-    valid, error = graph.validate()
-    if valid:
+    # Validate and analyze the graph in a single traversal
+    analysis = graph.analyze()
+    if analysis.valid:
         print("  Graph validation: PASSED")
     else:
-        print(f"  Graph validation: FAILED - {error}")
+        print(f"  Graph validation: FAILED - {analysis.error_message}")
     print()
 
-    # Get execution order
-    order = graph.get_execution_order()
+    # Execution order
+    order = analysis.execution_order
     print("Execution Order:")
     for i, node_id in enumerate(order):
-        kernel = graph.get_kernel(node_id)
-        print(f"  {i+1}. {kernel.name()} (node {node_id})")
+        print(f"  {i+1}. {name_of[node_id]} (node {node_id})")
     print()
 
-    # Get execution levels (for parallel scheduling)
-    levels = graph.get_execution_levels()
+    # Execution levels (for parallel scheduling)
+    levels = analysis.execution_levels
     print("Execution Levels (parallel scheduling):")
     for level_idx, level in enumerate(levels):
-        kernels = [graph.get_kernel(nid).name() for nid in level]
+        kernels = [name_of[nid] for nid in level]
         print(f"  Level {level_idx}: {', '.join(kernels)}")
     print()
 
-    # Find fusion opportunities
-    fusible = graph.find_fusible_pairs()
+    # Fusion opportunities
+    fusible = analysis.fusible_pairs
     print(f"Fusion opportunities: {len(fusible)} pairs found")
     for from_id, to_id in fusible:
-        from_name = graph.get_kernel(from_id).name()
-        to_name = graph.get_kernel(to_id).name()
-        print(f"  {from_name} <-> {to_name}")
+        print(f"  {name_of[from_id]} <-> {name_of[to_id]}")
     print()
 
-    # Compute statistics
-    stats = graph.compute_stats()
+    # Statistics
+    stats = analysis.stats
     print("Graph Statistics:")
     print(f"  Total nodes: {stats.num_nodes}")
     print(f"  Total edges: {stats.num_edges}")
@@ -191,7 +210,7 @@ def demo_kernel_graph():
     result = graph.compile()
     if result.success:
         print(f"  Success!")
-        print(f"  Execution order: {result.execution_order}")
+        print(f"  Execution order: {result.execution_order.tolist()}")
         print(f"  Fused pairs: {len(result.fused_pairs)}")
         print(f"  Workspace required: {result.workspace_required / 1024:.1f} KB")
     else:
@@ -211,35 +230,26 @@ def demo_diamond_graph():
     print("Creating diamond-pattern graph...")
     graph = kpu.KernelGraph("diamond_pattern")
 
-    # Input layer
-    input_node = graph.add_kernel(
-        kpu.Kernel.create_matmul(64, 64, 128),
-        "input"
-    )
-
-    # Left branch
-    left = graph.add_kernel(
-        kpu.Kernel.create_matmul(64, 128, 64),
-        "left_branch"
-    )
-
-    # Right branch
-    right = graph.add_kernel(
-        kpu.Kernel.create_matmul(64, 128, 64),
-        "right_branch"
-    )
-
-    # Merge layer
-    merge = graph.add_kernel(
-        kpu.Kernel.create_matmul(64, 64, 128),
-        "merge"
-    )
+    # Add all four layers in a single call
+    layers = [
+        (kpu.Kernel.create_matmul(64, 64, 128), "input"),
+        (kpu.Kernel.create_matmul(64, 128, 64), "left_branch"),
+        (kpu.Kernel.create_matmul(64, 128, 64), "right_branch"),
+        (kpu.Kernel.create_matmul(64, 64, 128), "merge"),
+    ]
+    input_node, left, right, merge = node_ids = graph.add_kernels(layers)
+    node_label = {nid: label for nid, (_, label) in zip(node_ids, layers)}
 
     # Connect edges
-    graph.add_edge(input_node, left, "C", "A")
-    graph.add_edge(input_node, right, "C", "A")
-    graph.add_edge(left, merge, "C", "A")
-    graph.add_edge(right, merge, "C", "B")
+    graph.add_edges([
+        (input_node, left, "C", "A"),
+        (input_node, right, "C", "A"),
+        (left, merge, "C", "A"),
+        (right, merge, "C", "B"),
+    ])
+
+    # Resolve kernel names once rather than on every printed line
+    name_of = {nid: graph.get_kernel(nid).name() for nid in graph.node_ids()}
 
     print(f"  Nodes: {graph.num_nodes()}")
     print(f"  Edges: {graph.num_edges()}")
@@ -249,21 +259,30 @@ def demo_diamond_graph():
     levels = graph.get_execution_levels()
     print("Parallel Execution Levels:")
     for level_idx, level in enumerate(levels):
-        kernels = [graph.get_kernel(nid).name() for nid in level]
+        kernels = [name_of[nid] for nid in level]
         parallelism = "parallel" if len(kernels) > 1 else "sequential"
         print(f"  Level {level_idx} ({parallelism}): {', '.join(kernels)}")
     print()
 
+    # Sibling GEMMs reading the same input can merge into one wider-N matmul
+    groups = graph.find_shared_input_groups()
+    print(f"Shared-input GEMM groups: {len(groups)} found")
+    for group in groups:
+        members = " + ".join(node_label[nid] for nid in group)
+        print(f"  Detected gate/up-style fusion: {members} share input")
+    print()
+
     # Show critical path
     critical = graph.get_critical_path()
     print("Critical Path:")
-    path_names = [graph.get_kernel(nid).name() for nid in critical]
+    path_names = [name_of[nid] for nid in critical]
     print(f"  {' -> '.join(path_names)}")
     print()
 
     # Get DOT visualization
     print("DOT graph (for Graphviz visualization):")
-    print(graph.to_dot(True))
+    graph.write_dot(sys.stdout, True)
+    print()
 
 def demo_concurrent_executor():
     """Demonstrate the concurrent executor"""
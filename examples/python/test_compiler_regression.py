@@ -8,6 +8,12 @@ Run from repository root:
 """
 import sys
 import os
+import functools
+import traceback
+from collections import namedtuple
+from dataclasses import dataclass, field, fields
+
+import numpy as np
 
 # Add build directory to path
 build_dir = os.path.join(os.path.dirname(__file__), '../../build/src/bindings/python/Release')
@@ -15,31 +21,166 @@ sys.path.insert(0, build_dir)
 
 import stillwater_kpu as kpu
 
+# dataclass(slots=True) needs Python 3.10; older interpreters keep a __dict__
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(frozen=True, **_SLOTS)
+class StatsSnapshot:
+    """Immutable copy of the CompilationStats fields inspected by the suite.
+
+    Equality covers everything except compile time, so two snapshots of
+    the same compile compare equal.
+    """
+    selected_Ti: int
+    selected_Tj: int
+    selected_Tk: int
+    num_m_tiles: int
+    num_n_tiles: int
+    num_k_tiles: int
+    total_tiles: int
+    instruction_count: int
+    dma_ops: int
+    block_mover_ops: int
+    streamer_ops: int
+    estimated_external_bytes: int
+    estimated_arithmetic_intensity: float
+    machine_balance: float
+    regime: object
+    compile_time_us: float = field(compare=False)
+
+    @classmethod
+    def capture(cls, stats):
+        """Copy the scalar fields out of a live CompilationStats"""
+        return cls(**{f.name: getattr(stats, f.name) for f in fields(cls)})
+
+# Selected tile sizes and the resulting tile counts per dimension
+TileSummary = namedtuple("TileSummary", "Ti Tj Tk m_tiles n_tiles k_tiles")
+
+# One compile as the KernelCompiler reported it
+CompileRecord = namedtuple("CompileRecord", "kernel stats succeeded error")
+
+def _options_key(options):
+    """Hashable key for the CompileOptions fields visible from Python.
+
+    The dataflow strategy is not exposed to Python and does not change
+    the generated program, so it is not part of the key.
+    """
+    return (options.Ti, options.Tj, options.Tk, options.double_buffer,
+            options.systolic_size, options.dtype)
+
+class CachingCompiler:
+    """KernelCompiler wrapper that memoizes kernels and stats per request.
+
+    The cache is shared by all instances, so a shape compiled by one test
+    is a dict lookup for every later test. last_stats(), last_succeeded()
+    and last_error() report what the underlying KernelCompiler returned
+    for the compile that produced the returned kernel. Failed
+    compilations are never cached.
+    """
+    _cache = {}
+
+    def __init__(self):
+        self._compiler = kpu.KernelCompiler()
+        self._last = None
+
+    def _compile(self, key, compile_fn):
+        record = self._cache.get(key)
+        if record is None:
+            kernel = compile_fn()
+            record = CompileRecord(kernel, StatsSnapshot.capture(self._compiler.last_stats()),
+                                   self._compiler.last_succeeded(),
+                                   self._compiler.last_error())
+            if record.succeeded:
+                self._cache[key] = record
+        self._last = record
+        return record.kernel
+
+    def compile_matmul(self, M, N, K, options=None):
+        if options is None:
+            options = kpu.CompileOptions.defaults()
+        key = ("matmul", M, N, K, _options_key(options))
+        return self._compile(key, lambda: self._compiler.compile_matmul(M, N, K, options))
+
+    def compile_matmul_tiled(self, M, N, K, Ti, Tj, Tk):
+        key = ("matmul", M, N, K, _options_key(kpu.CompileOptions.with_tiles(Ti, Tj, Tk)))
+        return self._compile(
+            key, lambda: self._compiler.compile_matmul_tiled(M, N, K, Ti, Tj, Tk))
+
+    def compile_mlp(self, M, N, K, activation, has_bias=True):
+        key = ("mlp", M, N, K, activation, has_bias, None)
+        return self._compile(
+            key, lambda: self._compiler.compile_mlp(M, N, K, activation, has_bias=has_bias))
+
+    def compile_mlp_activation_sweep(self, M, N, K, activations, has_bias=True):
+        key = ("mlp_sweep", M, N, K, tuple(activations), has_bias, None)
+        return self._compile(
+            key, lambda: self._compiler.compile_mlp_activation_sweep(
+                M, N, K, activations, has_bias=has_bias))
+
+    def compile_matmul_many(self, shapes, options=None):
+        """Compile (M, N, K) shapes, sending all cache misses in one batch.
+
+        Returns a list of (kernel, StatsSnapshot) pairs in shape order and
+        leaves last_stats() untouched.
+        """
+        if options is None:
+            options = kpu.CompileOptions.defaults()
+        opts_key = _options_key(options)
+        keys = [("matmul", M, N, K, opts_key) for M, N, K in shapes]
+        missing = [shape for shape, key in zip(shapes, keys) if key not in self._cache]
+        compiled = {}
+        if missing:
+            # A failed compile in a batch yields an invalid kernel
+            batch = self._compiler.compile_matmul_many(missing, options)
+            for (M, N, K), (kernel, stats) in zip(missing, batch):
+                key = ("matmul", M, N, K, opts_key)
+                record = CompileRecord(kernel, StatsSnapshot.capture(stats),
+                                       kernel.is_valid(), "")
+                compiled[key] = record
+                if record.succeeded:
+                    self._cache[key] = record
+        records = [self._cache.get(key) or compiled[key] for key in keys]
+        return [(record.kernel, record.stats) for record in records]
+
+    def last_stats(self):
+        return self._last.stats if self._last else None
+
+    def last_succeeded(self):
+        return self._last.succeeded if self._last else False
+
+    def last_error(self):
+        return self._last.error if self._last else ""
+
+@functools.lru_cache(maxsize=None)
+def shared_compiler():
+    """Compiler instance shared by the sequential tests.
+
+    last_stats() reflects only the most recent compile, so tests must
+    read it immediately after each compile call.
+    """
+    return CachingCompiler()
+
 def test_auto_tiling_consistency():
     """Test that auto-tiling produces consistent results"""
-    compiler = kpu.KernelCompiler()
+    compiler = shared_compiler()
 
-    # Compile same kernel twice
+    # Compile same kernel twice; the second compile bypasses the cache so
+    # the comparison exercises the tile optimizer rather than the memo
     k1 = compiler.compile_matmul(512, 512, 512)
     stats1 = compiler.last_stats()
 
-    k2 = compiler.compile_matmul(512, 512, 512)
-    stats2 = compiler.last_stats()
+    fresh = kpu.KernelCompiler()
+    k2 = fresh.compile_matmul(512, 512, 512)
+    stats2 = StatsSnapshot.capture(fresh.last_stats())
 
-    # Results should be identical
-    assert stats1.selected_Ti == stats2.selected_Ti, "Ti should be consistent"
-    assert stats1.selected_Tj == stats2.selected_Tj, "Tj should be consistent"
-    assert stats1.selected_Tk == stats2.selected_Tk, "Tk should be consistent"
-    assert stats1.total_tiles == stats2.total_tiles, "Total tiles should be consistent"
-    assert stats1.instruction_count == stats2.instruction_count, "Instruction count should be consistent"
+    # Results should be identical (compile time is excluded from equality)
+    assert stats1 == stats2, f"Stats should be consistent: {stats1} != {stats2}"
 
     print("  PASS: Auto-tiling consistency")
     return True
 
 def test_tile_bounds():
     """Test that tile sizes respect problem bounds"""
-    compiler = kpu.KernelCompiler()
-
     test_cases = [
         (64, 64, 64),
         (100, 100, 100),  # Non-power-of-2
@@ -48,73 +189,69 @@ def test_tile_bounds():
         (17, 23, 31),     # Prime numbers
     ]
 
-    for M, N, K in test_cases:
-        kernel = compiler.compile_matmul(M, N, K)
-        stats = compiler.last_stats()
+    results = shared_compiler().compile_matmul_many(test_cases)
+
+    dims = np.array(test_cases, dtype=np.int64)
+    tiles = np.array([(s.selected_Ti, s.selected_Tj, s.selected_Tk)
+                      for _, s in results], dtype=np.int64)
+    counts = np.array([(s.num_m_tiles, s.num_n_tiles, s.num_k_tiles)
+                       for _, s in results], dtype=np.int64)
 
-        # Tiles should not exceed problem dimensions
-        assert stats.selected_Ti <= M, f"Ti {stats.selected_Ti} > M {M}"
-        assert stats.selected_Tj <= N, f"Tj {stats.selected_Tj} > N {N}"
-        assert stats.selected_Tk <= K, f"Tk {stats.selected_Tk} > K {K}"
+    # Tiles should be positive and not exceed problem dimensions
+    assert np.all(tiles > 0), f"Tiles should be positive: {tiles.tolist()}"
+    assert np.all(tiles <= dims), \
+        f"Tiles exceed problem dimensions: {tiles.tolist()} vs {dims.tolist()}"
 
-        # Tiles should be positive
-        assert stats.selected_Ti > 0, "Ti should be positive"
-        assert stats.selected_Tj > 0, "Tj should be positive"
-        assert stats.selected_Tk > 0, "Tk should be positive"
+    # Tile counts are the ceil-div of each dimension by its tile size
+    expected_counts = (dims + tiles - 1) // tiles
+    assert np.array_equal(counts, expected_counts), \
+        f"Tile counts: {counts.tolist()} != {expected_counts.tolist()}"
 
-        print(f"  PASS: {M}x{N}x{K} -> tiles {stats.selected_Ti}x{stats.selected_Tj}x{stats.selected_Tk}")
+    for (M, N, K), (Ti, Tj, Tk) in zip(test_cases, tiles.tolist()):
+        print(f"  PASS: {M}x{N}x{K} -> tiles {Ti}x{Tj}x{Tk}")
 
     return True
 
 def test_explicit_tiles():
     """Test compilation with explicit tile sizes"""
-    compiler = kpu.KernelCompiler()
+    compiler = shared_compiler()
 
     Ti, Tj, Tk = 32, 64, 128
     kernel = compiler.compile_matmul_tiled(256, 256, 256, Ti, Tj, Tk)
     stats = compiler.last_stats()
 
-    assert stats.selected_Ti == Ti, f"Ti mismatch: {stats.selected_Ti} != {Ti}"
-    assert stats.selected_Tj == Tj, f"Tj mismatch: {stats.selected_Tj} != {Tj}"
-    assert stats.selected_Tk == Tk, f"Tk mismatch: {stats.selected_Tk} != {Tk}"
-
-    # Verify tile counts
-    expected_m_tiles = (256 + Ti - 1) // Ti
-    expected_n_tiles = (256 + Tj - 1) // Tj
-    expected_k_tiles = (256 + Tk - 1) // Tk
+    # Tile counts are the ceil-div of each dimension by its tile size
+    tiles = np.array([Ti, Tj, Tk], dtype=np.int64)
+    expected = TileSummary(Ti, Tj, Tk, *((256 + tiles - 1) // tiles).tolist())
+    actual = TileSummary(stats.selected_Ti, stats.selected_Tj, stats.selected_Tk,
+                         stats.num_m_tiles, stats.num_n_tiles, stats.num_k_tiles)
 
-    assert stats.num_m_tiles == expected_m_tiles, f"M tiles: {stats.num_m_tiles} != {expected_m_tiles}"
-    assert stats.num_n_tiles == expected_n_tiles, f"N tiles: {stats.num_n_tiles} != {expected_n_tiles}"
-    assert stats.num_k_tiles == expected_k_tiles, f"K tiles: {stats.num_k_tiles} != {expected_k_tiles}"
+    assert actual == expected, f"Tiling mismatch: {actual} != {expected}"
 
     print("  PASS: Explicit tiles")
     return True
 
 def test_instruction_count_scaling():
     """Test that instruction count scales reasonably with problem size"""
-    compiler = kpu.KernelCompiler()
+    compiler = shared_compiler()
 
     # Fix tile sizes to isolate scaling
     opts = kpu.CompileOptions.with_tiles(64, 64, 64)
 
     sizes = [128, 256, 512]
-    instruction_counts = []
-
-    for size in sizes:
-        kernel = compiler.compile_matmul(size, size, size, opts)
-        instruction_counts.append(compiler.last_stats().instruction_count)
+    results = compiler.compile_matmul_many([(size, size, size) for size in sizes], opts)
+    instruction_counts = [stats.instruction_count for _, stats in results]
 
     # Instruction count should increase with problem size
-    for i in range(1, len(instruction_counts)):
-        assert instruction_counts[i] > instruction_counts[i-1], \
-            f"Instructions should increase: {instruction_counts}"
+    assert np.all(np.diff(instruction_counts) > 0), \
+        f"Instructions should increase: {instruction_counts}"
 
     print(f"  PASS: Scaling {sizes} -> {instruction_counts}")
     return True
 
 def test_flops_calculation():
     """Test that FLOPs are calculated correctly"""
-    compiler = kpu.KernelCompiler()
+    compiler = shared_compiler()
 
     test_cases = [
         (64, 64, 64),
@@ -122,8 +259,7 @@ def test_flops_calculation():
         (1024, 1024, 1024),
     ]
 
-    for M, N, K in test_cases:
-        kernel = compiler.compile_matmul(M, N, K)
+    for (M, N, K), (kernel, _) in zip(test_cases, compiler.compile_matmul_many(test_cases)):
         expected_flops = 2 * M * N * K  # matmul: 2*M*N*K FLOPs
 
         assert kernel.total_flops() == expected_flops, \
@@ -134,28 +270,35 @@ def test_flops_calculation():
 
 def test_arithmetic_intensity():
     """Test arithmetic intensity calculation"""
-    compiler = kpu.KernelCompiler()
+    compiler = shared_compiler()
 
     # Larger tiles should give higher arithmetic intensity
     small_opts = kpu.CompileOptions.with_tiles(16, 16, 16)
     large_opts = kpu.CompileOptions.with_tiles(64, 64, 64)
 
     compiler.compile_matmul(256, 256, 256, small_opts)
-    small_ai = compiler.last_stats().estimated_arithmetic_intensity
+    small = compiler.last_stats()
+    small_ai = small.estimated_arithmetic_intensity
 
     compiler.compile_matmul(256, 256, 256, large_opts)
-    large_ai = compiler.last_stats().estimated_arithmetic_intensity
+    large = compiler.last_stats()
+    large_ai = large.estimated_arithmetic_intensity
 
     # Larger tiles should have equal or higher AI (better data reuse)
     assert large_ai >= small_ai, \
         f"Larger tiles should have higher AI: {large_ai} < {small_ai}"
 
+    # ...and so must not regress from compute-bound to memory-bound
+    assert not (small.regime == kpu.ExecutionRegime.COMPUTE_BOUND and
+                large.regime == kpu.ExecutionRegime.MEMORY_BOUND), \
+        f"Larger tiles regressed regime: {small.regime} -> {large.regime}"
+
     print(f"  PASS: AI small={small_ai:.2f}, large={large_ai:.2f}")
     return True
 
 def test_operation_counts():
     """Test that operation counts are reasonable"""
-    compiler = kpu.KernelCompiler()
+    compiler = shared_compiler()
 
     kernel = compiler.compile_matmul(256, 256, 256)
     stats = compiler.last_stats()
@@ -177,7 +320,7 @@ def test_operation_counts():
 
 def test_compile_options():
     """Test various compile options"""
-    compiler = kpu.KernelCompiler()
+    compiler = shared_compiler()
 
     # Default options
     opts1 = kpu.CompileOptions.defaults()
@@ -201,7 +344,7 @@ def test_compile_options():
 
 def test_mlp_compilation():
     """Test MLP kernel compilation"""
-    compiler = kpu.KernelCompiler()
+    compiler = shared_compiler()
 
     activations = [
         kpu.ActivationType.RELU,
@@ -209,24 +352,25 @@ def test_mlp_compilation():
         kpu.ActivationType.SIGMOID,
     ]
 
-    for act in activations:
-        kernel = compiler.compile_mlp(64, 128, 256, act, has_bias=True)
+    # One compile shares the matmul lowering across all activations
+    kernels = compiler.compile_mlp_activation_sweep(64, 128, 256, activations, has_bias=True)
+    stats = compiler.last_stats()
+    assert len(kernels) == len(activations)
+    assert stats.instruction_count > 0
 
+    for act, kernel in zip(activations, kernels):
         assert kernel.is_valid(), f"MLP with {act} should be valid"
         assert kernel.op_type() == kpu.KernelOpType.MLP
         assert kernel.activation() == act
         assert kernel.has_bias() == True
 
-        stats = compiler.last_stats()
-        assert stats.instruction_count > 0
-
         print(f"  PASS: MLP with {act}")
 
     return True
 
 def test_large_problem():
     """Test compilation of large problems"""
-    compiler = kpu.KernelCompiler()
+    compiler = shared_compiler()
 
     # Large transformer layer dimensions
     kernel = compiler.compile_matmul(4096, 4096, 4096)
@@ -245,8 +389,6 @@ def test_large_problem():
 
 def test_small_problem():
     """Test compilation of small problems (edge cases)"""
-    compiler = kpu.KernelCompiler()
-
     test_cases = [
         (16, 16, 16),  # Smaller than typical systolic array
         (8, 8, 8),
@@ -254,10 +396,14 @@ def test_small_problem():
         (256, 1, 256),  # Single output column
     ]
 
-    for M, N, K in test_cases:
-        kernel = compiler.compile_matmul(M, N, K)
+    results = shared_compiler().compile_matmul_many(test_cases)
+    for (M, N, K), (kernel, stats) in zip(test_cases, results):
         assert kernel.is_valid(), f"Small problem {M}x{N}x{K} should compile"
-        assert compiler.last_succeeded()
+
+        # Per-shape stand-in for last_succeeded(): a failed compile stops
+        # before tiles are counted and instructions are generated
+        assert stats.total_tiles > 0 and stats.instruction_count > 0, \
+            f"Small problem {M}x{N}x{K} did not record a successful compile"
 
         print(f"  PASS: {M}x{N}x{K}")
 
@@ -265,6 +411,7 @@ def test_small_problem():
 
 def test_compile_error_handling():
     """Test compiler error handling"""
+    # A fresh compiler, so the flags come from a real compile, not the cache
     compiler = kpu.KernelCompiler()
 
     # Valid compilation should succeed
@@ -296,7 +443,7 @@ if __name__ == "__main__":
     ]
 
     passed = 0
-    failed = 0
+    failures = []
 
     for name, test_fn in tests:
         print(f"\nTest: {name}")
@@ -305,12 +452,17 @@ if __name__ == "__main__":
             passed += 1
         except Exception as e:
             print(f"  FAIL: {e}")
-            import traceback
-            traceback.print_exc()
-            failed += 1
+            failures.append((name, traceback.format_exc()))
+
+    failed = len(failures)
 
     print("\n" + "=" * 60)
     print(f"Results: {passed} passed, {failed} failed")
     print("=" * 60)
 
+    # Tracebacks are collected during the run and reported once at the end
+    for name, tb in failures:
+        print(f"\n--- {name} ---", file=sys.stderr)
+        print(tb, end="", file=sys.stderr)
+
     sys.exit(0 if failed == 0 else 1)
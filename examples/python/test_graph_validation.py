@@ -4,28 +4,41 @@ Graph Validation Suite
 Verifies graph construction, validation, and analysis
 
 Run from repository root:
-    python3 examples/python/test_graph_validation.py
+    python3 -m pytest examples/python/test_graph_validation.py
+
+or run this file directly. With pytest-xdist installed, add ``-n auto`` to
+spread the tests across processes.
 """
+import functools
 import sys
 import os
 
+import numpy as np
+import pytest
+
 # Add build directory to path
 build_dir = os.path.join(os.path.dirname(__file__), '../../build/src/bindings/python/Release')
 sys.path.insert(0, build_dir)
 
 import stillwater_kpu as kpu
 
+@functools.lru_cache(maxsize=None)
+def _matmul(M, N, K):
+    """Shared matmul kernel per shape; add_kernel() copies it into the graph"""
+    return kpu.Kernel.create_matmul(M, N, K)
+
 def test_graph_construction():
     """Test basic graph construction"""
     graph = kpu.KernelGraph("test_graph")
+    graph.reserve(2, 1)
 
     assert graph.empty()
     assert graph.num_nodes() == 0
     assert graph.num_edges() == 0
 
     # Add nodes
-    n1 = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "node1")
-    n2 = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "node2")
+    n1 = graph.add_kernel(_matmul(64, 64, 64), "node1")
+    n2 = graph.add_kernel(_matmul(64, 64, 64), "node2")
 
     assert not graph.empty()
     assert graph.num_nodes() == 2
@@ -43,9 +56,6 @@ def test_graph_construction():
     incoming = graph.incoming_edges(n2)
     assert len(incoming) == 1
 
-    print("  PASS: Graph construction")
-    return True
-
 def test_graph_naming():
     """Test graph and node naming"""
     graph = kpu.KernelGraph("my_network")
@@ -56,20 +66,18 @@ def test_graph_naming():
     assert graph.name == "renamed_network"
 
     # Add named nodes
-    n1 = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "layer1")
+    n1 = graph.add_kernel(_matmul(64, 64, 64), "layer1")
     kernel = graph.get_kernel(n1)
     # Node name is stored in the graph, kernel name is separate
 
-    print("  PASS: Graph naming")
-    return True
-
 def test_cycle_detection():
     """Test that cycles are detected"""
     graph = kpu.KernelGraph("cycle_test")
+    graph.reserve(3, 2)
 
-    n1 = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "a")
-    n2 = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "b")
-    n3 = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "c")
+    n1 = graph.add_kernel(_matmul(64, 64, 64), "a")
+    n2 = graph.add_kernel(_matmul(64, 64, 64), "b")
+    n3 = graph.add_kernel(_matmul(64, 64, 64), "c")
 
     graph.add_edge(n1, n2, "C", "A")
     graph.add_edge(n2, n3, "C", "A")
@@ -82,33 +90,42 @@ def test_cycle_detection():
     would_not_cycle = graph.would_create_cycle(n1, n3)
     assert not would_not_cycle, "No cycle here"
 
-    print("  PASS: Cycle detection")
-    return True
+    # A cyclic batch is rejected without modifying the graph
+    kernels = [(_matmul(64, 64, 64), name) for name in ("x", "y")]
+    with pytest.raises(ValueError):
+        graph.build(kernels, [(0, 1, "C", "A"), (1, 0, "C", "A")])
+    assert graph.num_nodes() == 3 and graph.num_edges() == 2
+
+    # So is an edge batch whose last edge closes a cycle: no edge is added
+    with pytest.raises(ValueError):
+        graph.add_edges([(n1, n3, "C", "A"), (n3, n1, "C", "A")])
+    assert graph.num_edges() == 2
 
 def test_topological_sort():
     """Test execution order (topological sort)"""
     graph = kpu.KernelGraph("topo_test")
+    graph.reserve(3, 2)
 
     # Create chain: a -> b -> c
-    a = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "a")
-    b = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "b")
-    c = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "c")
+    a = graph.add_kernel(_matmul(64, 64, 64), "a")
+    b = graph.add_kernel(_matmul(64, 64, 64), "b")
+    c = graph.add_kernel(_matmul(64, 64, 64), "c")
 
     graph.add_edge(a, b, "C", "A")
     graph.add_edge(b, c, "C", "A")
 
     order = graph.get_execution_order()
+    assert isinstance(order, np.ndarray) and len(order) == 3
 
     # a must come before b, b must come before c
-    assert order.index(a) < order.index(b), "a should come before b"
-    assert order.index(b) < order.index(c), "b should come before c"
-
-    print("  PASS: Topological sort")
-    return True
+    pos = {nid: i for i, nid in enumerate(order)}
+    assert pos[a] < pos[b], "a should come before b"
+    assert pos[b] < pos[c], "b should come before c"
 
 def test_parallel_levels():
     """Test parallel execution level detection"""
     graph = kpu.KernelGraph("parallel_test")
+    graph.reserve(4, 4)
 
     # Diamond pattern:
     #       top
@@ -116,10 +133,10 @@ def test_parallel_levels():
     #    left  right
     #       \ /
     #      bottom
-    top = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "top")
-    left = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "left")
-    right = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "right")
-    bottom = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "bottom")
+    top = graph.add_kernel(_matmul(64, 64, 64), "top")
+    left = graph.add_kernel(_matmul(64, 64, 64), "left")
+    right = graph.add_kernel(_matmul(64, 64, 64), "right")
+    bottom = graph.add_kernel(_matmul(64, 64, 64), "bottom")
 
     graph.add_edge(top, left, "C", "A")
     graph.add_edge(top, right, "C", "A")
@@ -137,20 +154,14 @@ def test_parallel_levels():
     # Verify level 1 contains left and right
     assert left in levels[1] and right in levels[1]
 
-    print("  PASS: Parallel level detection")
-    return True
-
 def test_critical_path():
     """Test critical path detection"""
     graph = kpu.KernelGraph("critical_test")
 
-    # Chain with varying compute
-    n1 = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "small1")
-    n2 = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "small2")
-    n3 = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "small3")
-
-    graph.add_edge(n1, n2, "C", "A")
-    graph.add_edge(n2, n3, "C", "A")
+    # Chain with varying compute, built in one call
+    n1, n2, n3 = graph.build(
+        [(_matmul(64, 64, 64), f"small{i}") for i in (1, 2, 3)],
+        [(0, 1, "C", "A"), (1, 2, "C", "A")])
 
     critical = graph.get_critical_path()
 
@@ -158,15 +169,13 @@ def test_critical_path():
     assert len(critical) == 3
     assert n1 in critical and n2 in critical and n3 in critical
 
-    print("  PASS: Critical path detection")
-    return True
-
 def test_graph_validation():
     """Test graph validation"""
     # Valid graph with nodes and edges
     valid_graph = kpu.KernelGraph("valid")
-    n1 = valid_graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "a")
-    n2 = valid_graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "b")
+    valid_graph.reserve(2, 1)
+    n1 = valid_graph.add_kernel(_matmul(64, 64, 64), "a")
+    n2 = valid_graph.add_kernel(_matmul(64, 64, 64), "b")
     valid_graph.add_edge(n1, n2, "C", "A")
 
     is_valid, error = valid_graph.validate()
@@ -174,7 +183,8 @@ def test_graph_validation():
 
     # Single node graph should be valid
     single_graph = kpu.KernelGraph("single")
-    single_graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "only")
+    single_graph.reserve(1, 0)
+    single_graph.add_kernel(_matmul(64, 64, 64), "only")
     is_valid, error = single_graph.validate()
     assert is_valid, f"Single node graph should be valid: {error}"
 
@@ -184,17 +194,15 @@ def test_graph_validation():
     assert not is_valid, "Empty graph should be invalid"
     assert "empty" in error.lower(), f"Error should mention empty: {error}"
 
-    print("  PASS: Graph validation")
-    return True
-
 def test_input_output_nodes():
     """Test identification of input and output nodes"""
     graph = kpu.KernelGraph("io_test")
+    graph.reserve(3, 2)
 
     # Create graph: input -> middle -> output
-    input_node = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "input")
-    middle = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "middle")
-    output_node = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "output")
+    input_node = graph.add_kernel(_matmul(64, 64, 64), "input")
+    middle = graph.add_kernel(_matmul(64, 64, 64), "middle")
+    output_node = graph.add_kernel(_matmul(64, 64, 64), "output")
 
     graph.add_edge(input_node, middle, "C", "A")
     graph.add_edge(middle, output_node, "C", "A")
@@ -205,12 +213,10 @@ def test_input_output_nodes():
     assert len(inputs) == 1 and input_node in inputs
     assert len(outputs) == 1 and output_node in outputs
 
-    print("  PASS: Input/output node detection")
-    return True
-
 def test_graph_statistics():
     """Test graph statistics computation"""
     graph = kpu.KernelGraph("stats_test")
+    graph.reserve(2, 1)
 
     # Two-layer network
     fc1 = graph.add_kernel(
@@ -234,35 +240,33 @@ def test_graph_statistics():
     assert stats.total_output_bytes > 0
     assert stats.avg_arithmetic_intensity > 0
 
-    print("  PASS: Graph statistics")
-    return True
-
 def test_fusion_detection():
     """Test fusible pair detection"""
     graph = kpu.KernelGraph("fusion_test")
 
     # Chain of layers (producer-consumer pairs are fusible)
-    n1 = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "layer1")
-    n2 = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "layer2")
-    n3 = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "layer3")
-
-    graph.add_edge(n1, n2, "C", "A")
-    graph.add_edge(n2, n3, "C", "A")
+    graph.build(
+        [(_matmul(64, 64, 64), f"layer{i}") for i in (1, 2, 3)],
+        [(0, 1, "C", "A"), (1, 2, "C", "A")])
 
     fusible = graph.find_fusible_pairs()
 
-    # Should find fusible pairs
+    # Should find fusible pairs, one (producer, consumer) row each
     assert len(fusible) >= 1, "Should find at least one fusible pair"
+    assert isinstance(fusible, np.ndarray) and fusible.shape == (len(fusible), 2)
 
-    print("  PASS: Fusion detection")
-    return True
+    # analyze() reports the same ids, in the same array form
+    analysis = graph.analyze()
+    assert np.array_equal(analysis.fusible_pairs, fusible)
+    assert np.array_equal(analysis.execution_order, graph.get_execution_order())
 
 def test_dot_export():
     """Test DOT graph export"""
     graph = kpu.KernelGraph("dot_test")
+    graph.reserve(2, 1)
 
-    n1 = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "layer1")
-    n2 = graph.add_kernel(kpu.Kernel.create_matmul(64, 64, 64), "layer2")
+    n1 = graph.add_kernel(_matmul(64, 64, 64), "layer1")
+    n2 = graph.add_kernel(_matmul(64, 64, 64), "layer2")
     graph.add_edge(n1, n2, "C", "A")
 
     dot = graph.to_dot(show_tensor_sizes=True)
@@ -273,12 +277,10 @@ def test_dot_export():
     assert "layer2" in dot
     assert "->" in dot
 
-    print("  PASS: DOT export")
-    return True
-
 def test_graph_compilation():
     """Test graph compilation"""
     graph = kpu.KernelGraph("compile_test")
+    graph.reserve(2, 1)
 
     fc1 = graph.add_kernel(
         kpu.Kernel.create_mlp(64, 128, 64, kpu.ActivationType.RELU, True),
@@ -293,48 +295,9 @@ def test_graph_compilation():
     result = graph.compile()
 
     assert result.success, f"Compilation failed: {result.error_message}"
-    assert len(result.execution_order) == 2
+    assert isinstance(result.execution_order, np.ndarray)
+    assert result.execution_order.tolist() == [fc1, fc2]
     assert result.workspace_required > 0
 
-    print("  PASS: Graph compilation")
-    return True
-
 if __name__ == "__main__":
-    print("=" * 60)
-    print("  Graph Validation Suite")
-    print("=" * 60)
-
-    tests = [
-        ("Graph Construction", test_graph_construction),
-        ("Graph Naming", test_graph_naming),
-        ("Cycle Detection", test_cycle_detection),
-        ("Topological Sort", test_topological_sort),
-        ("Parallel Levels", test_parallel_levels),
-        ("Critical Path", test_critical_path),
-        ("Graph Validation", test_graph_validation),
-        ("Input/Output Nodes", test_input_output_nodes),
-        ("Graph Statistics", test_graph_statistics),
-        ("Fusion Detection", test_fusion_detection),
-        ("DOT Export", test_dot_export),
-        ("Graph Compilation", test_graph_compilation),
-    ]
-
-    passed = 0
-    failed = 0
-
-    for name, test_fn in tests:
-        print(f"\nTest: {name}")
-        try:
-            test_fn()
-            passed += 1
-        except Exception as e:
-            print(f"  FAIL: {e}")
-            import traceback
-            traceback.print_exc()
-            failed += 1
-
-    print("\n" + "=" * 60)
-    print(f"Results: {passed} passed, {failed} failed")
-    print("=" * 60)
-
-    sys.exit(0 if failed == 0 else 1)
+    sys.exit(pytest.main([__file__]))
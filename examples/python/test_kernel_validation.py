@@ -4,11 +4,17 @@ Kernel Validation Suite
 Verifies kernel creation and metadata correctness
 
 Run from repository root:
-    python3 examples/python/test_kernel_validation.py
+    python3 -m pytest examples/python/test_kernel_validation.py
+
+or run this file directly. With pytest-xdist installed, add ``-n auto`` to
+spread the tests across processes.
 """
 import sys
 import os
 
+import numpy as np
+import pytest
+
 # Add build directory to path
 build_dir = os.path.join(os.path.dirname(__file__), '../../build/src/bindings/python/Release')
 sys.path.insert(0, build_dir)
@@ -17,28 +23,18 @@ import stillwater_kpu as kpu
 
 def test_matmul_kernel():
     """Test matmul kernel creation"""
-    test_cases = [
-        (64, 64, 64),
-        (128, 256, 512),
-        (1024, 1024, 1024),
-        (32, 128, 64),
-    ]
+    shapes = np.array([
+        [64, 64, 64],
+        [128, 256, 512],
+        [1024, 1024, 1024],
+        [32, 128, 64],
+    ], dtype=np.int64)
 
-    for M, N, K in test_cases:
-        kernel = kpu.Kernel.create_matmul(M, N, K)
-
-        # Verify dimensions
-        assert kernel.M() == M, f"M mismatch: {kernel.M()} != {M}"
-        assert kernel.N() == N, f"N mismatch: {kernel.N()} != {N}"
-        assert kernel.K() == K, f"K mismatch: {kernel.K()} != {K}"
+    kernels = [kpu.Kernel.create_matmul(M, N, K) for M, N, K in shapes.tolist()]
 
+    for (M, N, K), kernel in zip(shapes.tolist(), kernels):
         # Verify validity
-        assert kernel.is_valid(), f"Kernel should be valid"
-
-        # Verify FLOPs calculation (2*M*N*K for matmul)
-        expected_flops = 2 * M * N * K
-        assert kernel.total_flops() == expected_flops, \
-            f"FLOPs mismatch: {kernel.total_flops()} != {expected_flops}"
+        assert kernel.is_valid(), f"Kernel {M}x{N}x{K} should be valid"
 
         # Verify arguments
         args = kernel.arguments()
@@ -47,38 +43,39 @@ def test_matmul_kernel():
         arg_names = {arg.name for arg in args}
         assert arg_names == {"A", "B", "C"}, f"Unexpected arguments: {arg_names}"
 
-        print(f"  PASS: matmul {M}x{N}x{K}")
-
-    return True
-
-def test_mlp_kernel():
-    """Test MLP kernel creation with various activations"""
-    activations = [
-        kpu.ActivationType.NONE,
-        kpu.ActivationType.RELU,
-        kpu.ActivationType.GELU,
-        kpu.ActivationType.SIGMOID,
-        kpu.ActivationType.TANH,
-        kpu.ActivationType.SILU,
-    ]
-
-    M, N, K = 64, 128, 256
-
-    for act in activations:
-        kernel = kpu.Kernel.create_mlp(M, N, K, act, has_bias=True)
+    # Verify dimensions and FLOPs (2*M*N*K for matmul) for all shapes at once
+    dims = np.array([(k.M(), k.N(), k.K()) for k in kernels], dtype=np.int64)
+    assert np.array_equal(dims, shapes), \
+        f"Dimension mismatch: {dims.tolist()} != {shapes.tolist()}"
+
+    flops = np.array([k.total_flops() for k in kernels], dtype=np.int64)
+    expected_flops = 2 * shapes.prod(axis=1)
+    assert np.array_equal(flops, expected_flops), \
+        f"FLOPs mismatch: {flops.tolist()} != {expected_flops.tolist()}"
+
+@pytest.mark.parametrize("act", [
+    kpu.ActivationType.NONE,
+    kpu.ActivationType.RELU,
+    kpu.ActivationType.GELU,
+    kpu.ActivationType.SIGMOID,
+    kpu.ActivationType.TANH,
+    kpu.ActivationType.SILU,
+])
+def test_mlp_kernel(act):
+    """Test MLP kernel creation with each activation"""
+    kernel = kpu.Kernel.create_mlp(64, 128, 256, act, has_bias=True)
 
-        assert kernel.is_valid()
-        assert kernel.op_type() == kpu.KernelOpType.MLP
-        assert kernel.activation() == act
-        assert kernel.has_bias() == True
-
-        # MLP with bias has 4 arguments: A, B, bias, C
-        args = kernel.arguments()
-        assert len(args) == 4
-
-        print(f"  PASS: MLP with {act}")
+    assert kernel.is_valid()
+    assert kernel.op_type() == kpu.KernelOpType.MLP
+    assert kernel.activation() == act
+    assert kernel.has_bias() == True
 
-    return True
+    # MLP with bias has 4 arguments: A, B, bias, C
+    args = kernel.arguments()
+    assert len(args) == 4
+    assert [arg.role for arg in args] == [
+        kpu.ArgRole.A, kpu.ArgRole.B, kpu.ArgRole.BIAS, kpu.ArgRole.C]
+    assert [arg.name for arg in args] == ["A", "B", "bias", "C"]
 
 def test_mlp_without_bias():
     """Test MLP kernel without bias"""
@@ -91,35 +88,25 @@ def test_mlp_without_bias():
     args = kernel.arguments()
     assert len(args) == 3
 
-    print("  PASS: MLP without bias")
-    return True
-
 def test_kernel_validation():
     """Test kernel validation"""
     kernel = kpu.Kernel.create_matmul(64, 64, 64)
     valid, error = kernel.validate()
     assert valid, f"Valid kernel failed validation: {error}"
-    print("  PASS: Kernel validation")
-    return True
 
-def test_data_types():
+@pytest.mark.parametrize("dtype,expected_size,expected_name", [
+    (kpu.DataType.FLOAT32, 4, "float32"),
+    (kpu.DataType.FLOAT16, 2, "float16"),
+    (kpu.DataType.BFLOAT16, 2, "bfloat16"),
+    (kpu.DataType.INT8, 1, "int8"),
+    (kpu.DataType.INT4, 1, "int4"),
+])
+def test_data_types(dtype, expected_size, expected_name):
     """Test data type support"""
-    test_dtypes = [
-        (kpu.DataType.FLOAT32, 4, "float32"),
-        (kpu.DataType.FLOAT16, 2, "float16"),
-        (kpu.DataType.BFLOAT16, 2, "bfloat16"),
-        (kpu.DataType.INT8, 1, "int8"),
-        (kpu.DataType.INT4, 1, "int4"),
-    ]
-
-    for dtype, expected_size, expected_name in test_dtypes:
-        assert kpu.dtype_size(dtype) == expected_size, \
-            f"Size mismatch for {dtype}"
-        assert kpu.dtype_name(dtype) == expected_name, \
-            f"Name mismatch for {dtype}"
-        print(f"  PASS: {expected_name} (size={expected_size})")
-
-    return True
+    assert kpu.dtype_size(dtype) == expected_size, \
+        f"Size mismatch for {dtype}"
+    assert kpu.dtype_name(dtype) == expected_name, \
+        f"Name mismatch for {dtype}"
 
 def test_kernel_summary():
     """Test kernel summary output"""
@@ -130,37 +117,5 @@ def test_kernel_summary():
     assert "256" in summary  # Dimensions
     assert "matmul" in summary.lower() or "MATMUL" in summary
 
-    print("  PASS: Kernel summary")
-    return True
-
 if __name__ == "__main__":
-    print("=" * 60)
-    print("  Kernel Validation Suite")
-    print("=" * 60)
-
-    tests = [
-        ("Matmul Kernel Creation", test_matmul_kernel),
-        ("MLP Kernel Creation", test_mlp_kernel),
-        ("MLP Without Bias", test_mlp_without_bias),
-        ("Kernel Validation", test_kernel_validation),
-        ("Data Types", test_data_types),
-        ("Kernel Summary", test_kernel_summary),
-    ]
-
-    passed = 0
-    failed = 0
-
-    for name, test_fn in tests:
-        print(f"\nTest: {name}")
-        try:
-            test_fn()
-            passed += 1
-        except Exception as e:
-            print(f"  FAIL: {e}")
-            failed += 1
-
-    print("\n" + "=" * 60)
-    print(f"Results: {passed} passed, {failed} failed")
-    print("=" * 60)
-
-    sys.exit(0 if failed == 0 else 1)
+    sys.exit(pytest.main([__file__]))
@@ -6,8 +6,12 @@
 #include <sw/kpu/isa/data_movement_isa.hpp>
 #include <sw/compiler/tile_optimizer.hpp>
 
+#include <array>
 #include <string>
 #include <chrono>
+#include <optional>
+#include <utility>
+#include <vector>
 
 namespace sw::kpu::compiler {
 
@@ -40,6 +44,29 @@ inline const char* dataflow_strategy_name(DataflowStrategy strategy) {
     }
 }
 
+/**
+ * @brief Roofline classification of a compiled kernel
+ *
+ * A kernel is compute-bound when its arithmetic intensity reaches the
+ * machine balance (peak FLOPs per cycle / peak external bytes per cycle),
+ * and memory-bound otherwise.
+ */
+enum class ExecutionRegime : uint8_t {
+    COMPUTE_BOUND = 0,  ///< Limited by systolic array throughput
+    MEMORY_BOUND = 1    ///< Limited by external memory bandwidth
+};
+
+/**
+ * @brief Get string name for execution regime
+ */
+inline const char* execution_regime_name(ExecutionRegime regime) {
+    switch (regime) {
+        case ExecutionRegime::COMPUTE_BOUND: return "compute_bound";
+        case ExecutionRegime::MEMORY_BOUND: return "memory_bound";
+        default: return "unknown";
+    }
+}
+
 /**
  * @brief Compilation options for kernel generation
  *
@@ -232,6 +259,10 @@ struct CompilationStats {
     Size estimated_l2_bytes = 0;          ///< Estimated L2 traffic
     double estimated_arithmetic_intensity = 0.0;  ///< FLOPs per byte from DRAM
 
+    // Roofline classification
+    double machine_balance = 0.0;         ///< Peak FLOPs per external byte
+    ExecutionRegime regime = ExecutionRegime::MEMORY_BOUND;  ///< AI vs machine balance
+
     // Tile loop counts
     Size num_m_tiles = 0;                 ///< Number of tiles in M dimension
     Size num_n_tiles = 0;                 ///< Number of tiles in N dimension
@@ -357,6 +388,43 @@ public:
                        DataType dtype = DataType::FLOAT32,
                        const CompileOptions& options = CompileOptions::defaults());
 
+    /**
+     * @brief Compile a batch of matrix multiplication kernels
+     * @param shapes (M, N, K) dimensions of each kernel
+     * @param options Compilation options applied to every shape
+     * @return Compiled kernel and its statistics, in the order of shapes
+     *
+     * Each shape is compiled by a private KernelCompiler sharing this
+     * compiler's memory hierarchy, so the batch may be compiled in
+     * parallel (OpenMP, when available) and last_stats() is left untouched.
+     * A failed compilation yields an invalid Kernel.
+     */
+    std::vector<std::pair<Kernel, CompilationStats>> compile_matmul_many(
+        const std::vector<std::array<Size, 3>>& shapes,
+        const CompileOptions& options = CompileOptions::defaults()) const;
+
+    /**
+     * @brief Compile one MLP per activation, sharing the matmul lowering
+     * @param M Rows of A and C
+     * @param N Columns of B and C
+     * @param K Columns of A, rows of B
+     * @param activations Activation function of each kernel
+     * @param has_bias Whether to apply bias addition
+     * @param dtype Data type (default FLOAT32)
+     * @param options Compilation options (default: auto-optimize)
+     * @return One kernel per activation, in order (empty on failure)
+     *
+     * Tile selection and program generation run once; each kernel gets a
+     * copy of the program with its own epilogue metadata. last_stats()
+     * describes the last kernel, with compile time covering the sweep.
+     */
+    std::vector<Kernel> compile_mlp_activation_sweep(
+        Size M, Size N, Size K,
+        const std::vector<ActivationType>& activations,
+        bool has_bias = true,
+        DataType dtype = DataType::FLOAT32,
+        const CompileOptions& options = CompileOptions::defaults());
+
     // =========================================
     // Tile Optimization
     // =========================================
@@ -422,6 +490,16 @@ private:
     bool last_succeeded_ = false;
     std::string last_error_;
 
+    /**
+     * @brief Shared matmul lowering for compile_matmul and compile_mlp
+     *
+     * Resets the compilation status, selects tiles, generates the program
+     * and records tile, operation, L2 traffic and dataflow statistics.
+     * Returns nullopt (with last_error_ set) if tile selection fails.
+     */
+    std::optional<isa::DMProgram> compile_matmul_core(
+        Size M, Size N, Size K, const CompileOptions& options);
+
     /**
      * @brief Build OutputStationaryProgramBuilder::Config from options and tile config
      */
@@ -430,6 +508,22 @@ private:
         const TileOptimizer::TileConfig& tiles,
         const CompileOptions& options);
 
+    /**
+     * @brief Record tile loop counts in last_stats_
+     *
+     * Derives the counts from the dimensions and tile sizes.
+     */
+    void record_tile_counts(Size M, Size N, Size K,
+                            const TileOptimizer::TileConfig& tiles);
+
+    /**
+     * @brief Set machine_balance and regime in last_stats_
+     *
+     * Peak compute is 2 FLOPs per PE per cycle on the systolic array;
+     * peak bandwidth is the external memory peak of the pipeline.
+     */
+    void classify_regime(const CompileOptions& options);
+
     /**
      * @brief Select dataflow strategy based on problem dimensions
      */
@@ -7,6 +7,7 @@
 #include <sw/concepts.hpp>
 
 #include <string>
+#include <string_view>
 #include <vector>
 #include <memory>
 
@@ -39,11 +40,50 @@ inline const char* kernel_op_type_name(KernelOpType op) {
     }
 }
 
+/**
+ * @brief Role of a kernel argument
+ *
+ * The standard operands of the built-in kernels; any other argument
+ * name maps to CUSTOM.
+ */
+enum class ArgRole : uint8_t {
+    A = 0,              // Left operand [M, K]
+    B = 1,              // Right operand / weights [K, N]
+    C = 2,              // Output [M, N]
+    BIAS = 3,           // Bias vector [N]
+    CUSTOM = 255        // Any other name
+};
+
+/**
+ * @brief Get the argument name for a standard role ("" for CUSTOM)
+ */
+inline const char* arg_role_name(ArgRole role) {
+    switch (role) {
+        case ArgRole::A: return "A";
+        case ArgRole::B: return "B";
+        case ArgRole::C: return "C";
+        case ArgRole::BIAS: return "bias";
+        default: return "";
+    }
+}
+
+/**
+ * @brief Get the role for an argument name (CUSTOM if not a standard name)
+ */
+inline ArgRole arg_role_from_name(std::string_view name) {
+    if (name == "A") return ArgRole::A;
+    if (name == "B") return ArgRole::B;
+    if (name == "C") return ArgRole::C;
+    if (name == "bias") return ArgRole::BIAS;
+    return ArgRole::CUSTOM;
+}
+
 /**
  * @brief Kernel argument descriptor
  *
  * Describes an input or output argument to a kernel, including
- * its name, data type, shape, and size.
+ * its name, data type, shape, and size. role() is derived from the name,
+ * so the two cannot disagree after name is assigned.
  */
 struct KernelArgument {
     std::string name;           // Argument name (e.g., "A", "B", "C")
@@ -61,6 +101,17 @@ struct KernelArgument {
         size_bytes = compute_size();
     }
 
+    KernelArgument(ArgRole r, DataType dt,
+                   std::vector<Size> s, bool output = false)
+        : name(arg_role_name(r)), dtype(dt), shape(std::move(s)), is_output(output) {
+        size_bytes = compute_size();
+    }
+
+    /**
+     * @brief Role of this argument (CUSTOM for non-standard names)
+     */
+    ArgRole role() const { return arg_role_from_name(name); }
+
     /**
      * @brief Compute total size in bytes based on shape and dtype
      */
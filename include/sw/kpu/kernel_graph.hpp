@@ -5,13 +5,16 @@
 #include <sw/kpu/kernel.hpp>
 #include <sw/kpu/isa/data_movement_isa.hpp>
 
+#include <iosfwd>
 #include <vector>
 #include <memory>
+#include <mutex>
 #include <string>
 #include <unordered_map>
 #include <unordered_set>
 #include <functional>
 #include <optional>
+#include <tuple>
 
 namespace sw::kpu {
 
@@ -112,6 +115,22 @@ struct KernelGraphCompileResult {
     std::string error_message;
 };
 
+/**
+ * @brief Combined result of a single-pass graph analysis
+ *
+ * Produced by KernelGraph::analyze(), which computes everything below
+ * from one topological traversal instead of one traversal per query.
+ */
+struct KernelGraphAnalysis {
+    bool valid = false;                     // Result of validation
+    std::string error_message;              // Validation error (if invalid)
+    std::vector<size_t> execution_order;    // Topological order
+    std::vector<std::vector<size_t>> execution_levels;  // Parallel levels
+    std::vector<std::pair<size_t, size_t>> fusible_pairs;  // Fusion candidates, by producer id
+    std::vector<std::vector<size_t>> shared_input_groups;  // Sibling GEMMs on one input
+    KernelGraphStats stats;                 // Aggregate statistics
+};
+
 /**
  * @brief Kernel Graph - DAG of kernels with data dependencies
  *
@@ -126,6 +145,11 @@ struct KernelGraphCompileResult {
  * - Kernel fusion optimization
  * - Compilation to single DMProgram
  *
+ * Queries and modifications take an internal lock, so one graph can be
+ * shared between threads (the Python bindings release the GIL around the
+ * traversal queries). References returned by get_node(), get_kernel(),
+ * get_edge() and name() are not covered by the lock.
+ *
  * Example usage:
  * @code
  * KernelGraph graph;
@@ -187,11 +211,25 @@ public:
      */
     size_t add_kernel(std::unique_ptr<Kernel> kernel, const std::string& name = "");
 
+    /**
+     * @brief Reserve storage for a graph of known size
+     * @param num_nodes Total number of nodes the graph will hold
+     * @param num_edges Total number of edges the graph will hold
+     *
+     * Avoids repeated reallocation when many nodes and edges are added one
+     * at a time. Like std::vector::reserve, never shrinks.
+     */
+    void reserve(size_t num_nodes, size_t num_edges);
+
     /**
      * @brief Get a kernel node by ID
      * @param node_id The node ID
      * @return Reference to the node
      * @throws std::out_of_range if node doesn't exist
+     *
+     * The non-const overloads drop the memoized structural key, since the
+     * kernel may be edited through the returned reference. Finish such
+     * edits before the next structural_hash() or compile().
      */
     const KernelNode& get_node(size_t node_id) const;
     KernelNode& get_node(size_t node_id);
@@ -210,7 +248,10 @@ public:
     /**
      * @brief Get number of nodes
      */
-    size_t num_nodes() const { return nodes_.size(); }
+    size_t num_nodes() const {
+        std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+        return nodes_.size();
+    }
 
     /**
      * @brief Get all node IDs
@@ -234,6 +275,19 @@ public:
                     const std::string& output_name = "C",
                     const std::string& input_name = "A");
 
+    /**
+     * @brief Add a batch of edges between existing nodes
+     * @param edges (from_node, to_node, output_name, input_name) edges
+     * @return Edge IDs, in order
+     * @throws std::invalid_argument if a node doesn't exist, or the edges
+     *         contain a self-loop or would create a cycle
+     *
+     * The whole batch is validated up front (one cycle check over the
+     * graph plus the new edges), so on error no edge is added.
+     */
+    std::vector<size_t> add_edges(
+        const std::vector<std::tuple<size_t, size_t, std::string, std::string>>& edges);
+
     /**
      * @brief Get an edge by ID
      */
@@ -247,7 +301,10 @@ public:
     /**
      * @brief Get number of edges
      */
-    size_t num_edges() const { return edges_.size(); }
+    size_t num_edges() const {
+        std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+        return edges_.size();
+    }
 
     /**
      * @brief Get edges from a node
@@ -259,6 +316,27 @@ public:
      */
     std::vector<size_t> incoming_edges(size_t node_id) const;
 
+    // =========================================
+    // Bulk Construction
+    // =========================================
+
+    /**
+     * @brief Add a batch of kernels and the edges between them
+     * @param nodes (kernel, name) pairs to add (moved)
+     * @param edges (from, to, output_name, input_name) edges, where from and
+     *        to are positions in nodes rather than graph node IDs
+     * @return Node IDs assigned to nodes, in order
+     * @throws std::invalid_argument if a kernel is invalid, an edge index is
+     *         out of range, or the edges contain a self-loop or cycle
+     *
+     * The whole batch is validated up front, so on error the graph is left
+     * unchanged. Edges can only connect nodes in the same batch, which means
+     * the cycle check runs once over the batch instead of once per edge.
+     */
+    std::vector<size_t> build_batch(
+        std::vector<std::pair<Kernel, std::string>> nodes,
+        const std::vector<std::tuple<size_t, size_t, std::string, std::string>>& edges);
+
     // =========================================
     // Graph Properties
     // =========================================
@@ -271,12 +349,18 @@ public:
     /**
      * @brief Set graph name
      */
-    void set_name(const std::string& name) { name_ = name; }
+    void set_name(const std::string& name) {
+        std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+        name_ = name;
+    }
 
     /**
      * @brief Check if graph is empty
      */
-    bool empty() const { return nodes_.empty(); }
+    bool empty() const {
+        std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+        return nodes_.empty();
+    }
 
     /**
      * @brief Check if graph is valid (is a DAG with valid connections)
@@ -297,9 +381,35 @@ public:
 
     /**
      * @brief Compute graph statistics
+     *
+     * Kernel totals are summed on every call, so kernels replaced or
+     * edited through get_kernel() are always reflected.
      */
     KernelGraphStats compute_stats() const;
 
+    /**
+     * @brief Validate and analyze the graph in a single traversal
+     * @return Validation result, execution order, execution levels,
+     *         fusible pairs, and statistics
+     *
+     * Equivalent to calling validate(), get_execution_order(),
+     * get_execution_levels(), find_fusible_pairs() and compute_stats(),
+     * but walks the node and edge arrays once. If the graph is invalid,
+     * only valid and error_message are populated.
+     */
+    KernelGraphAnalysis analyze() const;
+
+    /**
+     * @brief Hash of the graph structure
+     * @return 64-bit hash over node ids, kernel attributes, kernel programs
+     *         and edges
+     *
+     * Node and graph names are not part of the hash. Equal hashes are a
+     * strong hint, not a guarantee, that two graphs compile to the same
+     * program; compile() compares the full structural key.
+     */
+    uint64_t structural_hash() const;
+
     // =========================================
     // Execution Order
     // =========================================
@@ -337,12 +447,27 @@ public:
      *
      * Two kernels can be fused if:
      * - They have a single edge connecting them
+     * - The producer has no other consumers
      * - The consumer has no other inputs from different nodes
      * - The output of producer matches input size of consumer
      * - Both use compatible data types
+     *
+     * Pairs are reported in ascending producer ID order.
      */
     std::vector<std::pair<size_t, size_t>> find_fusible_pairs() const;
 
+    /**
+     * @brief Find sibling GEMMs that read the same left operand
+     * @return Groups of two or more matmul/MLP nodes, each sorted by id,
+     *         in lexicographic order
+     *
+     * Nodes are grouped when their A input comes from the same producer
+     * output and they agree on M, K and data type. Each group can be
+     * merged into one wider-N matmul (B operands concatenated along N,
+     * outputs sliced), so A is read once instead of once per sibling.
+     */
+    std::vector<std::vector<size_t>> find_shared_input_groups() const;
+
     /**
      * @brief Check if two kernels can be fused
      */
@@ -367,10 +492,21 @@ public:
      * @brief Compile the graph to a single DMProgram
      * @param options Compilation options
      * @return Compilation result with program and metadata
+     *
+     * Successful results are memoized in a process-wide LRU cache of the
+     * 32 most recent results, keyed on the graph's full structure
+     * (including each kernel's program) and the options. The structural
+     * key is built once per graph and reused until the graph changes, so
+     * recompiling is a lookup and a graph edited in place is recompiled.
      */
     KernelGraphCompileResult compile(
         const KernelGraphCompileOptions& options = {}) const;
 
+    /**
+     * @brief Drop all memoized compile() results
+     */
+    static void clear_compile_cache();
+
     /**
      * @brief Compile without fusion (simple concatenation)
      * @return Compilation result
@@ -389,7 +525,7 @@ public:
      */
     template<typename Func>
     void for_each_node(Func&& func) const {
-        for (const auto& [id, node] : nodes_) {
+        for (const auto& node : nodes_) {
             func(node);
         }
     }
@@ -419,14 +555,76 @@ public:
      */
     std::string to_dot(bool show_tensor_sizes = true) const;
 
+    /**
+     * @brief Write DOT format directly to a stream
+     * @param os Output stream
+     * @param show_tensor_sizes Include tensor sizes on edges
+     */
+    void write_dot(std::ostream& os, bool show_tensor_sizes = true) const;
+
 private:
+    /**
+     * @brief Longest-path data for every node, indexed by node id
+     */
+    struct DagResolution {
+        static constexpr size_t kNoNode = static_cast<size_t>(-1);
+
+        std::vector<size_t> level;      // Longest distance from any input node
+        std::vector<size_t> pred;       // Predecessor on that longest path
+        size_t max_level = 0;
+        size_t deepest_node = kNoNode;  // First node (in execution order) at max_level
+    };
+
+    /**
+     * @brief Packed (CSR) adjacency over a list of edges
+     *
+     * Successors of node u are out_col_idx[out_row_ptr[u] .. out_row_ptr[u+1])
+     * with the matching edge ids in out_edge_idx, in insertion order. Node
+     * u's in-degree is in_row_ptr[u+1] - in_row_ptr[u].
+     */
+    struct Adjacency {
+        std::vector<uint32_t> out_row_ptr;
+        std::vector<uint32_t> out_col_idx;
+        std::vector<uint32_t> out_edge_idx;
+        std::vector<uint32_t> in_row_ptr;
+    };
+
     std::string name_;
-    std::unordered_map<size_t, KernelNode> nodes_;
+    std::vector<KernelNode> nodes_;     // Indexed by node id
     std::vector<KernelEdge> edges_;
-    size_t next_node_id_ = 0;
 
-    // Cached execution order (invalidated on modifications)
+    // Cached traversal results (invalidated on modifications)
     mutable std::optional<std::vector<size_t>> cached_execution_order_;
+    mutable std::optional<DagResolution> cached_resolution_;
+    mutable std::optional<Adjacency> cached_adjacency_;
+    mutable std::optional<std::vector<std::vector<size_t>>> cached_execution_levels_;
+    mutable std::optional<std::vector<size_t>> cached_critical_path_;
+    mutable std::optional<std::vector<size_t>> cached_input_nodes_;
+    mutable std::optional<std::vector<size_t>> cached_output_nodes_;
+    mutable std::optional<std::string> cached_structural_key_;
+    mutable std::optional<uint64_t> cached_structural_hash_;
+
+    // Scratch state for reachability queries, reused across calls.
+    // reached_ holds one bit per node id (ids are dense: 0..num_nodes()-1).
+    mutable std::vector<uint64_t> reached_;
+    mutable std::vector<size_t> frontier_;
+
+    /**
+     * @brief Recursive mutex that a moved graph does not carry along
+     *
+     * Moving a graph gives the destination a fresh, unlocked mutex so the
+     * defaulted move operations still work.
+     */
+    struct CacheMutex : std::recursive_mutex {
+        CacheMutex() = default;
+        CacheMutex(CacheMutex&&) noexcept {}
+        CacheMutex& operator=(CacheMutex&&) noexcept { return *this; }
+    };
+
+    // Guards the graph, the caches and the scratch state above; taken by
+    // every query and modification. Recursive because queries and
+    // modifications build on one another.
+    mutable CacheMutex cache_mutex_;
 
     /**
      * @brief Invalidate cached data after graph modification
@@ -434,16 +632,85 @@ private:
     void invalidate_cache();
 
     /**
-     * @brief DFS helper for cycle detection
+     * @brief Bitset BFS reachability check used for cycle detection
+     */
+    bool has_path(size_t from, size_t to) const;
+
+    /**
+     * @brief Emit DOT text (shared by to_dot and write_dot)
+     *
+     * Each line is appended to out and then passed to flush(out): to_dot
+     * lets the text accumulate, write_dot writes the line to its stream
+     * and clears the buffer.
+     */
+    template <typename Flush>
+    void append_dot(std::string& out, bool show_tensor_sizes, Flush flush) const;
+
+    /**
+     * @brief Append an edge between existing nodes without validation
+     */
+    size_t append_edge(size_t from_node, size_t to_node,
+                       const std::string& output_name,
+                       const std::string& input_name);
+
+    /**
+     * @brief Kernel-level fusion checks for a producer -> consumer edge
+     *
+     * Assumes the edge exists; shared by can_fuse(), find_fusible_pairs()
+     * and analyze().
+     */
+    bool is_fusible_edge(const KernelNode& prod_node,
+                         const KernelNode& cons_node) const;
+
+    /**
+     * @brief Append the shared-input GEMM groups fed by one producer
+     */
+    void collect_shared_input_groups(const KernelNode& producer,
+                                     std::vector<std::vector<size_t>>& groups) const;
+
+    /**
+     * @brief Resolve levels and longest-path predecessors (cached)
+     *
+     * One relaxation sweep over the execution order feeds
+     * get_execution_levels(), get_critical_path() and compute_stats().
+     */
+    const DagResolution& resolve_dag() const;
+
+    /**
+     * @brief Packed adjacency for traversals (built lazily, cached)
+     */
+    const Adjacency& adjacency() const;
+
+    /**
+     * @brief Pack (from, to) pairs over num_nodes nodes into an adjacency
+     *
+     * out_edge_idx holds each edge's position in the list.
+     */
+    static Adjacency pack_edges(size_t num_nodes,
+                                const std::vector<std::pair<size_t, size_t>>& edges);
+
+    /**
+     * @brief Kahn's topological sort over an adjacency
+     * @return Node ids in execution order; shorter than the node count
+     *         when the adjacency has a cycle
+     */
+    static std::vector<size_t> topological_order(const Adjacency& adj);
+
+    /**
+     * @brief Byte string identifying everything compile() depends on
+     *
+     * Kernel attributes and serialized programs in node id order, then the
+     * sorted edges; names are excluded. structural_hash() hashes it. Built
+     * once and kept until the graph changes or a mutable node or kernel
+     * reference is handed out.
      */
-    bool has_path_dfs(size_t from, size_t to,
-                      std::unordered_set<size_t>& visited) const;
+    const std::string& structural_key() const;
 
     /**
-     * @brief Calculate depth of a node in the DAG
+     * @brief compile() without the result cache
      */
-    size_t calculate_node_depth(size_t node_id,
-                                std::unordered_map<size_t, size_t>& depths) const;
+    KernelGraphCompileResult compile_uncached(
+        const KernelGraphCompileOptions& options) const;
 
     /**
      * @brief Compile a single kernel's program with memory offset
@@ -2,6 +2,7 @@
 #include <pybind11/stl.h>
 #include <pybind11/numpy.h>
 #include <pybind11/functional.h>
+#include <pybind11/iostream.h>
 
 // Core simulator
 #include "sw/kpu/kpu_simulator.hpp"
@@ -25,8 +26,70 @@
 #include "sw/runtime/runtime.hpp"
 #include "sw/runtime/executor.hpp"
 
+#include <memory>
+
 namespace py = pybind11;
 
+namespace {
+
+// Node and edge id vectors are handed to NumPy without copying: the
+// vector moves into a capsule that the returned array keeps alive, so no
+// Python int is created per id
+py::array_t<size_t> id_array(std::vector<size_t> ids, std::vector<py::ssize_t> shape) {
+    auto owned = std::make_unique<std::vector<size_t>>(std::move(ids));
+    size_t* data = owned->data();
+    py::capsule owner(owned.get(), [](void* p) {
+        delete static_cast<std::vector<size_t>*>(p);
+    });
+    owned.release();
+    return py::array_t<size_t>(std::move(shape), data, owner);
+}
+
+py::array_t<size_t> id_array(std::vector<size_t> ids) {
+    const auto count = static_cast<py::ssize_t>(ids.size());
+    return id_array(std::move(ids), {count});
+}
+
+// (producer, consumer) pairs as an (N, 2) id array
+py::array_t<size_t> id_pair_array(const std::vector<std::pair<size_t, size_t>>& pairs) {
+    std::vector<size_t> flat;
+    flat.reserve(2 * pairs.size());
+    for (const auto& [first, second] : pairs) {
+        flat.push_back(first);
+        flat.push_back(second);
+    }
+    return id_array(std::move(flat), {static_cast<py::ssize_t>(pairs.size()), 2});
+}
+
+py::list id_array_levels(std::vector<std::vector<size_t>> levels) {
+    py::list out(levels.size());
+    for (size_t i = 0; i < levels.size(); ++i) {
+        PyList_SET_ITEM(out.ptr(), static_cast<Py_ssize_t>(i),
+                        id_array(std::move(levels[i])).release().ptr());
+    }
+    return out;
+}
+
+// Names of the standard argument roles as interned Python strings, created
+// once and kept for the life of the interpreter, so reading arg.name on a
+// built-in kernel allocates nothing
+py::str arg_name(const sw::kpu::KernelArgument& arg) {
+    using sw::kpu::ArgRole;
+    static PyObject* const role_names[] = {
+        PyUnicode_InternFromString(sw::kpu::arg_role_name(ArgRole::A)),
+        PyUnicode_InternFromString(sw::kpu::arg_role_name(ArgRole::B)),
+        PyUnicode_InternFromString(sw::kpu::arg_role_name(ArgRole::C)),
+        PyUnicode_InternFromString(sw::kpu::arg_role_name(ArgRole::BIAS)),
+    };
+    const ArgRole role = arg.role();
+    if (role == ArgRole::CUSTOM) {
+        return py::str(arg.name);
+    }
+    return py::reinterpret_borrow<py::str>(role_names[static_cast<size_t>(role)]);
+}
+
+} // anonymous namespace
+
 PYBIND11_MODULE(stillwater_kpu, m) {
     m.doc() = "Stillwater KPU Simulator - High-performance C++ KPU simulator with Python bindings";
     
@@ -490,12 +553,26 @@ PYBIND11_MODULE(stillwater_kpu, m) {
         .value("CUSTOM", sw::kpu::KernelOpType::CUSTOM)
         .export_values();
 
+    // ArgRole enum (values not exported: CUSTOM would clash with KernelOpType)
+    py::enum_<sw::kpu::ArgRole>(m, "ArgRole")
+        .value("A", sw::kpu::ArgRole::A)
+        .value("B", sw::kpu::ArgRole::B)
+        .value("C", sw::kpu::ArgRole::C)
+        .value("BIAS", sw::kpu::ArgRole::BIAS)
+        .value("CUSTOM", sw::kpu::ArgRole::CUSTOM);
+
     // KernelArgument
     py::class_<sw::kpu::KernelArgument>(m, "KernelArgument")
         .def(py::init<>())
         .def(py::init<const std::string&, sw::kpu::DataType, std::vector<sw::kpu::Size>, bool>(),
              py::arg("name"), py::arg("dtype"), py::arg("shape"), py::arg("is_output") = false)
-        .def_readwrite("name", &sw::kpu::KernelArgument::name)
+        .def(py::init<sw::kpu::ArgRole, sw::kpu::DataType, std::vector<sw::kpu::Size>, bool>(),
+             py::arg("role"), py::arg("dtype"), py::arg("shape"), py::arg("is_output") = false)
+        .def_property("name", &arg_name,
+                      [](sw::kpu::KernelArgument& arg, std::string name) {
+                          arg.name = std::move(name);
+                      })
+        .def_property_readonly("role", &sw::kpu::KernelArgument::role)
         .def_readwrite("dtype", &sw::kpu::KernelArgument::dtype)
         .def_readwrite("shape", &sw::kpu::KernelArgument::shape)
         .def_readwrite("is_output", &sw::kpu::KernelArgument::is_output)
@@ -567,6 +644,12 @@ PYBIND11_MODULE(stillwater_kpu, m) {
         .value("AUTO", sw::kpu::compiler::DataflowStrategy::AUTO)
         .export_values();
 
+    // ExecutionRegime enum
+    py::enum_<sw::kpu::compiler::ExecutionRegime>(m, "ExecutionRegime")
+        .value("COMPUTE_BOUND", sw::kpu::compiler::ExecutionRegime::COMPUTE_BOUND)
+        .value("MEMORY_BOUND", sw::kpu::compiler::ExecutionRegime::MEMORY_BOUND)
+        .export_values();
+
     // CompilationStats
     py::class_<sw::kpu::compiler::CompilationStats>(m, "CompilationStats")
         .def(py::init<>())
@@ -581,6 +664,8 @@ PYBIND11_MODULE(stillwater_kpu, m) {
         .def_readonly("streamer_ops", &sw::kpu::compiler::CompilationStats::streamer_ops)
         .def_readonly("estimated_external_bytes", &sw::kpu::compiler::CompilationStats::estimated_external_bytes)
         .def_readonly("estimated_arithmetic_intensity", &sw::kpu::compiler::CompilationStats::estimated_arithmetic_intensity)
+        .def_readonly("machine_balance", &sw::kpu::compiler::CompilationStats::machine_balance)
+        .def_readonly("regime", &sw::kpu::compiler::CompilationStats::regime)
         .def_readonly("num_m_tiles", &sw::kpu::compiler::CompilationStats::num_m_tiles)
         .def_readonly("num_n_tiles", &sw::kpu::compiler::CompilationStats::num_n_tiles)
         .def_readonly("num_k_tiles", &sw::kpu::compiler::CompilationStats::num_k_tiles)
@@ -597,6 +682,7 @@ PYBIND11_MODULE(stillwater_kpu, m) {
                  &sw::kpu::compiler::KernelCompiler::compile_matmul),
              py::arg("M"), py::arg("N"), py::arg("K"),
              py::arg("options") = sw::kpu::compiler::CompileOptions::defaults(),
+             py::call_guard<py::gil_scoped_release>(),
              "Compile a matrix multiplication kernel with automatic optimization")
         // compile_matmul with explicit tile sizes
         .def("compile_matmul_tiled",
@@ -605,6 +691,7 @@ PYBIND11_MODULE(stillwater_kpu, m) {
                  &sw::kpu::compiler::KernelCompiler::compile_matmul),
              py::arg("M"), py::arg("N"), py::arg("K"),
              py::arg("Ti"), py::arg("Tj"), py::arg("Tk"),
+             py::call_guard<py::gil_scoped_release>(),
              "Compile a matrix multiplication kernel with explicit tile sizes")
         // compile_mlp
         .def("compile_mlp", &sw::kpu::compiler::KernelCompiler::compile_mlp,
@@ -613,8 +700,23 @@ PYBIND11_MODULE(stillwater_kpu, m) {
              py::arg("has_bias") = true,
              py::arg("dtype") = sw::kpu::DataType::FLOAT32,
              py::arg("options") = sw::kpu::compiler::CompileOptions::defaults(),
+             py::call_guard<py::gil_scoped_release>(),
              "Compile an MLP kernel with activation and bias")
+        .def("compile_mlp_activation_sweep",
+             &sw::kpu::compiler::KernelCompiler::compile_mlp_activation_sweep,
+             py::arg("M"), py::arg("N"), py::arg("K"),
+             py::arg("activations"),
+             py::arg("has_bias") = true,
+             py::arg("dtype") = sw::kpu::DataType::FLOAT32,
+             py::arg("options") = sw::kpu::compiler::CompileOptions::defaults(),
+             py::call_guard<py::gil_scoped_release>(),
+             "Compile one MLP kernel per activation, sharing tile selection and lowering")
         // Statistics
+        .def("compile_matmul_many", &sw::kpu::compiler::KernelCompiler::compile_matmul_many,
+             py::arg("shapes"),
+             py::arg("options") = sw::kpu::compiler::CompileOptions::defaults(),
+             py::call_guard<py::gil_scoped_release>(),
+             "Compile a list of (M, N, K) matmuls, returning (kernel, stats) pairs")
         .def("last_stats", &sw::kpu::compiler::KernelCompiler::last_stats,
              py::return_value_policy::reference,
              "Get statistics from the last compilation")
@@ -657,6 +759,25 @@ PYBIND11_MODULE(stillwater_kpu, m) {
         .def_readonly("intermediate_bytes", &sw::kpu::KernelGraphStats::intermediate_bytes)
         .def_readonly("avg_arithmetic_intensity", &sw::kpu::KernelGraphStats::avg_arithmetic_intensity);
 
+    // KernelGraphAnalysis
+    py::class_<sw::kpu::KernelGraphAnalysis>(m, "KernelGraphAnalysis")
+        .def(py::init<>())
+        .def_readonly("valid", &sw::kpu::KernelGraphAnalysis::valid)
+        .def_readonly("error_message", &sw::kpu::KernelGraphAnalysis::error_message)
+        .def_property_readonly("execution_order", [](const sw::kpu::KernelGraphAnalysis& self) {
+            return id_array(self.execution_order);
+        })
+        .def_property_readonly("execution_levels", [](const sw::kpu::KernelGraphAnalysis& self) {
+            return id_array_levels(self.execution_levels);
+        })
+        .def_property_readonly("fusible_pairs", [](const sw::kpu::KernelGraphAnalysis& self) {
+            return id_pair_array(self.fusible_pairs);
+        })
+        .def_property_readonly("shared_input_groups", [](const sw::kpu::KernelGraphAnalysis& self) {
+            return id_array_levels(self.shared_input_groups);
+        })
+        .def_readonly("stats", &sw::kpu::KernelGraphAnalysis::stats);
+
     // KernelGraphCompileOptions
     py::class_<sw::kpu::KernelGraphCompileOptions>(m, "KernelGraphCompileOptions")
         .def(py::init<>())
@@ -669,8 +790,12 @@ PYBIND11_MODULE(stillwater_kpu, m) {
     // KernelGraphCompileResult
     py::class_<sw::kpu::KernelGraphCompileResult>(m, "KernelGraphCompileResult")
         .def(py::init<>())
-        .def_readonly("execution_order", &sw::kpu::KernelGraphCompileResult::execution_order)
-        .def_readonly("fused_pairs", &sw::kpu::KernelGraphCompileResult::fused_pairs)
+        .def_property_readonly("execution_order", [](const sw::kpu::KernelGraphCompileResult& self) {
+            return id_array(self.execution_order);
+        })
+        .def_property_readonly("fused_pairs", [](const sw::kpu::KernelGraphCompileResult& self) {
+            return id_pair_array(self.fused_pairs);
+        })
         .def_readonly("workspace_required", &sw::kpu::KernelGraphCompileResult::workspace_required)
         .def_readonly("success", &sw::kpu::KernelGraphCompileResult::success)
         .def_readonly("error_message", &sw::kpu::KernelGraphCompileResult::error_message)
@@ -686,47 +811,160 @@ PYBIND11_MODULE(stillwater_kpu, m) {
         .def("add_kernel", [](sw::kpu::KernelGraph& self, sw::kpu::Kernel kernel, const std::string& name) {
             return self.add_kernel(std::move(kernel), name);
         }, py::arg("kernel"), py::arg("name") = "")
+        .def("add_kernels", [](sw::kpu::KernelGraph& self,
+                               std::vector<std::pair<sw::kpu::Kernel, std::string>> kernels) {
+            return id_array(self.build_batch(std::move(kernels), {}));
+        }, py::arg("kernels"),
+           "Add a list of (kernel, name) pairs in one call, returning their node IDs.\n"
+           "The graph is unchanged if any kernel is invalid.")
+        .def("reserve", &sw::kpu::KernelGraph::reserve,
+             py::arg("num_nodes"), py::arg("num_edges"),
+             "Reserve storage for num_nodes nodes and num_edges edges in total")
         .def("get_kernel", py::overload_cast<size_t>(&sw::kpu::KernelGraph::get_kernel, py::const_),
              py::return_value_policy::reference)
         .def("has_node", &sw::kpu::KernelGraph::has_node)
         .def("num_nodes", &sw::kpu::KernelGraph::num_nodes)
-        .def("node_ids", &sw::kpu::KernelGraph::node_ids)
+        .def("node_ids", [](const sw::kpu::KernelGraph& g) {
+            return id_array(g.node_ids());
+        })
         // Edge management
         .def("add_edge", &sw::kpu::KernelGraph::add_edge,
              py::arg("from_node"), py::arg("to_node"),
              py::arg("output_name") = "C", py::arg("input_name") = "A")
+        .def("add_edges", [](sw::kpu::KernelGraph& self,
+                             const std::vector<std::tuple<size_t, size_t, std::string, std::string>>& edges) {
+            return id_array(self.add_edges(edges));
+        }, py::arg("edges"),
+           "Add a list of (from_node, to_node, output_name, input_name) edges in one call,\n"
+           "returning their edge IDs. The graph is unchanged if any edge is invalid.")
+        .def("build", [](sw::kpu::KernelGraph& self,
+                         std::vector<std::pair<sw::kpu::Kernel, std::string>> nodes,
+                         const std::vector<std::tuple<size_t, size_t, std::string, std::string>>& edges) {
+            return id_array(self.build_batch(std::move(nodes), edges));
+        }, py::arg("nodes"), py::arg("edges"),
+             "Add (kernel, name) nodes and (from, to, output_name, input_name) edges in one call.\n"
+             "Edge endpoints index into nodes; returns the new node IDs. The graph is\n"
+             "unchanged if the batch is invalid.")
         .def("get_edge", &sw::kpu::KernelGraph::get_edge, py::return_value_policy::reference)
         .def("num_edges", &sw::kpu::KernelGraph::num_edges)
-        .def("outgoing_edges", &sw::kpu::KernelGraph::outgoing_edges)
-        .def("incoming_edges", &sw::kpu::KernelGraph::incoming_edges)
-        .def("would_create_cycle", &sw::kpu::KernelGraph::would_create_cycle)
+        .def("outgoing_edges", [](const sw::kpu::KernelGraph& g, size_t node_id) {
+            std::vector<size_t> ids;
+            {
+                py::gil_scoped_release release;
+                ids = g.outgoing_edges(node_id);
+            }
+            return id_array(std::move(ids));
+        }, py::arg("node_id"))
+        .def("incoming_edges", [](const sw::kpu::KernelGraph& g, size_t node_id) {
+            std::vector<size_t> ids;
+            {
+                py::gil_scoped_release release;
+                ids = g.incoming_edges(node_id);
+            }
+            return id_array(std::move(ids));
+        }, py::arg("node_id"))
+        .def("would_create_cycle", &sw::kpu::KernelGraph::would_create_cycle,
+             py::call_guard<py::gil_scoped_release>())
         // Graph properties
         .def_property("name", &sw::kpu::KernelGraph::name, &sw::kpu::KernelGraph::set_name)
         .def("empty", &sw::kpu::KernelGraph::empty)
         .def("validate", [](const sw::kpu::KernelGraph& self) {
             std::string error;
-            bool valid = self.validate(error);
+            bool valid;
+            {
+                py::gil_scoped_release release;
+                valid = self.validate(error);
+            }
             return py::make_tuple(valid, error);
         })
-        .def("input_nodes", &sw::kpu::KernelGraph::input_nodes)
-        .def("output_nodes", &sw::kpu::KernelGraph::output_nodes)
-        .def("compute_stats", &sw::kpu::KernelGraph::compute_stats)
-        // Execution order
-        .def("get_execution_order", &sw::kpu::KernelGraph::get_execution_order)
-        .def("get_execution_levels", &sw::kpu::KernelGraph::get_execution_levels)
-        .def("get_critical_path", &sw::kpu::KernelGraph::get_critical_path)
+        .def("input_nodes", [](const sw::kpu::KernelGraph& g) {
+            std::vector<size_t> ids;
+            {
+                py::gil_scoped_release release;
+                ids = g.input_nodes();
+            }
+            return id_array(std::move(ids));
+        })
+        .def("output_nodes", [](const sw::kpu::KernelGraph& g) {
+            std::vector<size_t> ids;
+            {
+                py::gil_scoped_release release;
+                ids = g.output_nodes();
+            }
+            return id_array(std::move(ids));
+        })
+        .def("compute_stats", &sw::kpu::KernelGraph::compute_stats,
+             py::call_guard<py::gil_scoped_release>())
+        .def("analyze", &sw::kpu::KernelGraph::analyze,
+             py::call_guard<py::gil_scoped_release>(),
+             "Validate and analyze the graph in a single traversal")
+        .def("structural_hash", &sw::kpu::KernelGraph::structural_hash,
+             py::call_guard<py::gil_scoped_release>(),
+             "Hash of node ids, kernel attributes, kernel programs and edges (names excluded)")
+        // Execution order (traversal runs without the GIL; the result is
+        // wrapped as a NumPy array after it is re-acquired)
+        .def("get_execution_order", [](const sw::kpu::KernelGraph& g) {
+            std::vector<size_t> order;
+            {
+                py::gil_scoped_release release;
+                order = g.get_execution_order();
+            }
+            return id_array(std::move(order));
+        })
+        .def("get_execution_levels", [](const sw::kpu::KernelGraph& g) {
+            std::vector<std::vector<size_t>> levels;
+            {
+                py::gil_scoped_release release;
+                levels = g.get_execution_levels();
+            }
+            return id_array_levels(std::move(levels));
+        })
+        .def("get_critical_path", [](const sw::kpu::KernelGraph& g) {
+            std::vector<size_t> path;
+            {
+                py::gil_scoped_release release;
+                path = g.get_critical_path();
+            }
+            return id_array(std::move(path));
+        })
         // Fusion
-        .def("find_fusible_pairs", &sw::kpu::KernelGraph::find_fusible_pairs)
-        .def("can_fuse", &sw::kpu::KernelGraph::can_fuse)
+        .def("find_fusible_pairs", [](const sw::kpu::KernelGraph& g) {
+            std::vector<std::pair<size_t, size_t>> pairs;
+            {
+                py::gil_scoped_release release;
+                pairs = g.find_fusible_pairs();
+            }
+            return id_pair_array(pairs);
+        })
+        .def("can_fuse", &sw::kpu::KernelGraph::can_fuse,
+             py::call_guard<py::gil_scoped_release>())
+        .def("find_shared_input_groups", [](const sw::kpu::KernelGraph& g) {
+            std::vector<std::vector<size_t>> groups;
+            {
+                py::gil_scoped_release release;
+                groups = g.find_shared_input_groups();
+            }
+            return id_array_levels(std::move(groups));
+        })
         .def("mark_for_fusion", &sw::kpu::KernelGraph::mark_for_fusion)
         .def("clear_fusion_marks", &sw::kpu::KernelGraph::clear_fusion_marks)
         // Compilation
         .def("compile", &sw::kpu::KernelGraph::compile,
              py::arg("options") = sw::kpu::KernelGraphCompileOptions{})
         .def("compile_sequential", &sw::kpu::KernelGraph::compile_sequential)
+        .def_static("clear_compile_cache", &sw::kpu::KernelGraph::clear_compile_cache)
         // Visualization
         .def("summary", &sw::kpu::KernelGraph::summary)
-        .def("to_dot", &sw::kpu::KernelGraph::to_dot, py::arg("show_tensor_sizes") = true);
+        .def("to_dot", &sw::kpu::KernelGraph::to_dot, py::arg("show_tensor_sizes") = true,
+             py::call_guard<py::gil_scoped_release>())
+        .def("write_dot", [](const sw::kpu::KernelGraph& g, py::object file, bool show_tensor_sizes) {
+            // Stream straight into file.write() instead of building a Python string
+            py::detail::pythonbuf buf(file);
+            std::ostream os(&buf);
+            g.write_dot(os, show_tensor_sizes);
+            os.flush();
+        }, py::arg("file"), py::arg("show_tensor_sizes") = true,
+           "Write DOT format to a text file object (e.g. sys.stdout)");
 
     // =========================================================================
     // Serialization
@@ -6,6 +6,7 @@
 #include <sstream>
 #include <iomanip>
 #include <chrono>
+#include <optional>
 
 namespace sw::kpu::compiler {
 
@@ -149,6 +150,8 @@ std::string CompilationStats::summary() const {
     ss << "    L2 Cache:        " << format_bytes_precise(estimated_l2_bytes) << "\n";
     ss << "    Arithmetic Intensity: " << std::fixed << std::setprecision(2)
        << estimated_arithmetic_intensity << " FLOPs/byte\n";
+    ss << "    Regime: " << execution_regime_name(regime)
+       << " (machine balance " << machine_balance << " FLOPs/byte)\n";
 
     ss << "\n  Dataflow: " << dataflow_strategy_name(dataflow_used) << "\n";
 
@@ -175,60 +178,14 @@ Kernel KernelCompiler::compile_matmul(Size M, Size N, Size K,
                                        const CompileOptions& options) {
     auto start_time = std::chrono::high_resolution_clock::now();
 
-    last_succeeded_ = false;
-    last_error_.clear();
-    last_stats_ = CompilationStats{};
-
-    // Step 1: Determine tile sizes
-    TileOptimizer::TileConfig tile_config;
-
-    if (options.is_auto_tiling()) {
-        // Use TileOptimizer for automatic tile selection
-        tile_config = tile_optimizer_.optimize(M, N, K, options.tile_strategy);
-        last_stats_.used_auto_tiling = true;
-
-        if (!tile_config.valid) {
-            last_error_ = "Tile optimization failed: " + tile_config.reason;
-            return Kernel{};
-        }
-    } else {
-        // Use explicit tile sizes from options
-        tile_config.Ti = options.Ti;
-        tile_config.Tj = options.Tj;
-        tile_config.Tk = options.Tk;
-        tile_config.L1_Ki = options.L1_Ki > 0 ? options.L1_Ki : options.Tk;
-        tile_config.valid = true;
-        last_stats_.used_auto_tiling = false;
+    // Steps 1-4: tile selection, program generation, operation counts
+    std::optional<isa::DMProgram> program = compile_matmul_core(M, N, K, options);
+    if (!program) {
+        return Kernel{};
     }
 
-    // Store tile sizes in stats
-    last_stats_.selected_Ti = tile_config.Ti;
-    last_stats_.selected_Tj = tile_config.Tj;
-    last_stats_.selected_Tk = tile_config.Tk;
-    last_stats_.selected_L1_Ki = tile_config.L1_Ki;
-
-    // Step 2: Build program configuration
-    isa::OutputStationaryProgramBuilder::Config prog_config =
-        build_program_config(M, N, K, tile_config, options);
-
-    // Step 3: Generate program
-    isa::OutputStationaryProgramBuilder builder(prog_config);
-    isa::DMProgram program = builder.build();
-
-    // Calculate tile counts first (needed for operation counting)
-    auto ceil_div = [](Size a, Size b) { return (a + b - 1) / b; };
-    last_stats_.num_m_tiles = ceil_div(M, tile_config.Ti);
-    last_stats_.num_n_tiles = ceil_div(N, tile_config.Tj);
-    last_stats_.num_k_tiles = ceil_div(K, tile_config.Tk);
-    last_stats_.total_tiles = last_stats_.num_m_tiles *
-                              last_stats_.num_n_tiles *
-                              last_stats_.num_k_tiles;
-
-    // Step 4: Count operations and record stats
-    Size elem_size = dtype_size(options.dtype);
-    count_operations(program, elem_size, tile_config);
-
     // Estimate memory traffic
+    Size elem_size = dtype_size(options.dtype);
     Size A_bytes = M * K * elem_size;
     Size B_bytes = K * N * elem_size;
     Size C_bytes = M * N * elem_size;
@@ -249,21 +206,12 @@ Kernel KernelCompiler::compile_matmul(Size M, Size N, Size K,
     // L3 traffic (moving to L2)
     last_stats_.estimated_l3_bytes = last_stats_.estimated_external_bytes;
 
-    // L2 traffic (streaming to L1)
-    last_stats_.estimated_l2_bytes = last_stats_.total_tiles *
-        (tile_config.Ti * tile_config.Tk +
-         tile_config.Tk * tile_config.Tj +
-         tile_config.Ti * tile_config.Tj) * elem_size;
-
     // Arithmetic intensity
     Size total_flops = 2 * M * N * K;
     last_stats_.estimated_arithmetic_intensity =
         static_cast<double>(total_flops) /
         static_cast<double>(last_stats_.estimated_external_bytes);
-
-    // Dataflow used
-    last_stats_.dataflow_used = (options.dataflow == DataflowStrategy::AUTO)
-        ? select_dataflow(M, N, K) : options.dataflow;
+    classify_regime(options);
 
     // Compile time
     auto end_time = std::chrono::high_resolution_clock::now();
@@ -274,7 +222,7 @@ Kernel KernelCompiler::compile_matmul(Size M, Size N, Size K,
     last_succeeded_ = true;
 
     // Create and return kernel
-    return Kernel(std::move(program), KernelOpType::MATMUL, options.dtype);
+    return Kernel(std::move(*program), KernelOpType::MATMUL, options.dtype);
 }
 
 Kernel KernelCompiler::compile_matmul(Size M, Size N, Size K,
@@ -295,74 +243,30 @@ Kernel KernelCompiler::compile_mlp(Size M, Size N, Size K,
                                     bool has_bias,
                                     DataType dtype,
                                     const CompileOptions& options) {
-    auto start_time = std::chrono::high_resolution_clock::now();
-
-    last_succeeded_ = false;
-    last_error_.clear();
-    last_stats_ = CompilationStats{};
-
-    // Step 1: Determine tile sizes (same as matmul)
-    TileOptimizer::TileConfig tile_config;
-
-    if (options.is_auto_tiling()) {
-        tile_config = tile_optimizer_.optimize(M, N, K, options.tile_strategy);
-        last_stats_.used_auto_tiling = true;
+    std::vector<Kernel> kernels = compile_mlp_activation_sweep(
+        M, N, K, {activation}, has_bias, dtype, options);
+    return kernels.empty() ? Kernel{} : std::move(kernels.front());
+}
 
-        if (!tile_config.valid) {
-            last_error_ = "Tile optimization failed: " + tile_config.reason;
-            return Kernel{};
-        }
-    } else {
-        tile_config.Ti = options.Ti;
-        tile_config.Tj = options.Tj;
-        tile_config.Tk = options.Tk;
-        tile_config.L1_Ki = options.L1_Ki > 0 ? options.L1_Ki : options.Tk;
-        tile_config.valid = true;
-        last_stats_.used_auto_tiling = false;
-    }
+std::vector<Kernel> KernelCompiler::compile_mlp_activation_sweep(
+    Size M, Size N, Size K,
+    const std::vector<ActivationType>& activations,
+    bool has_bias,
+    DataType dtype,
+    const CompileOptions& options) {
 
-    // Store tile sizes in stats
-    last_stats_.selected_Ti = tile_config.Ti;
-    last_stats_.selected_Tj = tile_config.Tj;
-    last_stats_.selected_Tk = tile_config.Tk;
-    last_stats_.selected_L1_Ki = tile_config.L1_Ki;
+    auto start_time = std::chrono::high_resolution_clock::now();
 
-    // Step 2: Build program configuration
+    // Steps 1-4 are shared by every activation; only the epilogue differs
     CompileOptions opts = options;
     opts.dtype = dtype;
-    isa::OutputStationaryProgramBuilder::Config prog_config =
-        build_program_config(M, N, K, tile_config, opts);
-
-    // Step 3: Generate program
-    // Note: For now, we generate the same program as matmul.
-    // The VE configuration is stored in the kernel metadata.
-    // Future: Modify OutputStationaryProgramBuilder to emit VE-enabled drain ops.
-    isa::OutputStationaryProgramBuilder builder(prog_config);
-    isa::DMProgram program = builder.build();
-
-    // Update program name to indicate MLP
-    std::ostringstream name_ss;
-    name_ss << "mlp_" << M << "x" << N << "x" << K;
-    if (has_bias) {
-        name_ss << "_bias";
+    std::optional<isa::DMProgram> program = compile_matmul_core(M, N, K, opts);
+    if (!program) {
+        return {};
     }
-    name_ss << "_" << activation_type_name(activation);
-    program.name = name_ss.str();
-
-    // Calculate tile counts first (needed for operation counting)
-    auto ceil_div = [](Size a, Size b) { return (a + b - 1) / b; };
-    last_stats_.num_m_tiles = ceil_div(M, tile_config.Ti);
-    last_stats_.num_n_tiles = ceil_div(N, tile_config.Tj);
-    last_stats_.num_k_tiles = ceil_div(K, tile_config.Tk);
-    last_stats_.total_tiles = last_stats_.num_m_tiles *
-                              last_stats_.num_n_tiles *
-                              last_stats_.num_k_tiles;
-
-    // Step 4: Count operations and record stats
-    Size elem_size = dtype_size(dtype);
-    count_operations(program, elem_size, tile_config);
 
     // Estimate memory traffic (MLP saves traffic via fusion)
+    Size elem_size = dtype_size(dtype);
     Size A_bytes = M * K * elem_size;
     Size B_bytes = K * N * elem_size;
     Size C_bytes = M * N * elem_size;
@@ -372,22 +276,35 @@ Kernel KernelCompiler::compile_mlp(Size M, Size N, Size K,
     last_stats_.estimated_external_bytes = A_bytes + B_bytes + C_bytes + bias_bytes;
     last_stats_.estimated_l3_bytes = last_stats_.estimated_external_bytes;
 
-    // L2 traffic
-    last_stats_.estimated_l2_bytes = last_stats_.total_tiles *
-        (tile_config.Ti * tile_config.Tk +
-         tile_config.Tk * tile_config.Tj +
-         tile_config.Ti * tile_config.Tj) * elem_size;
-
-    // Arithmetic intensity (MLP has slightly higher compute per byte)
-    Size total_flops = 2 * M * N * K;  // matmul
-    if (has_bias) total_flops += M * N;  // bias add
-    if (activation != ActivationType::NONE) total_flops += M * N;  // activation
-    last_stats_.estimated_arithmetic_intensity =
-        static_cast<double>(total_flops) /
-        static_cast<double>(last_stats_.estimated_external_bytes);
-
-    last_stats_.dataflow_used = (options.dataflow == DataflowStrategy::AUTO)
-        ? select_dataflow(M, N, K) : options.dataflow;
+    // Note: For now, we generate the same program as matmul.
+    // The VE configuration is stored in the kernel metadata.
+    // Future: Modify OutputStationaryProgramBuilder to emit VE-enabled drain ops.
+    std::vector<Kernel> kernels;
+    kernels.reserve(activations.size());
+    for (ActivationType activation : activations) {
+        isa::DMProgram mlp_program = *program;
+
+        // Update program name to indicate MLP
+        std::ostringstream name_ss;
+        name_ss << "mlp_" << M << "x" << N << "x" << K;
+        if (has_bias) {
+            name_ss << "_bias";
+        }
+        name_ss << "_" << activation_type_name(activation);
+        mlp_program.name = name_ss.str();
+
+        // Arithmetic intensity (MLP has slightly higher compute per byte)
+        Size total_flops = 2 * M * N * K;  // matmul
+        if (has_bias) total_flops += M * N;  // bias add
+        if (activation != ActivationType::NONE) total_flops += M * N;  // activation
+        last_stats_.estimated_arithmetic_intensity =
+            static_cast<double>(total_flops) /
+            static_cast<double>(last_stats_.estimated_external_bytes);
+
+        // Create MLP kernel using the specialized constructor
+        kernels.emplace_back(std::move(mlp_program), dtype, activation, has_bias);
+    }
+    classify_regime(opts);
 
     // Compile time
     auto end_time = std::chrono::high_resolution_clock::now();
@@ -397,8 +314,28 @@ Kernel KernelCompiler::compile_mlp(Size M, Size N, Size K,
 
     last_succeeded_ = true;
 
-    // Create MLP kernel using the specialized constructor
-    return Kernel(std::move(program), dtype, activation, has_bias);
+    return kernels;
+}
+
+std::vector<std::pair<Kernel, CompilationStats>> KernelCompiler::compile_matmul_many(
+    const std::vector<std::array<Size, 3>>& shapes,
+    const CompileOptions& options) const {
+
+    std::vector<std::pair<Kernel, CompilationStats>> results(shapes.size());
+    const auto count = static_cast<std::ptrdiff_t>(shapes.size());
+
+    // Shapes are independent; a compiler per shape keeps stats from aliasing
+#ifdef _OPENMP
+    #pragma omp parallel for schedule(dynamic)
+#endif
+    for (std::ptrdiff_t i = 0; i < count; ++i) {
+        const auto& shape = shapes[static_cast<size_t>(i)];
+        KernelCompiler local(memory_hierarchy());
+        Kernel kernel = local.compile_matmul(shape[0], shape[1], shape[2], options);
+        results[static_cast<size_t>(i)] = {std::move(kernel), local.last_stats()};
+    }
+
+    return results;
 }
 
 // ============================================================================
@@ -423,6 +360,69 @@ void KernelCompiler::set_memory_hierarchy(const TileOptimizer::MemoryHierarchy&
 // Private Methods
 // ============================================================================
 
+std::optional<isa::DMProgram> KernelCompiler::compile_matmul_core(
+    Size M, Size N, Size K, const CompileOptions& options) {
+
+    last_succeeded_ = false;
+    last_error_.clear();
+    last_stats_ = CompilationStats{};
+
+    // Step 1: Determine tile sizes
+    TileOptimizer::TileConfig tile_config;
+
+    if (options.is_auto_tiling()) {
+        // Use TileOptimizer for automatic tile selection
+        tile_config = tile_optimizer_.optimize(M, N, K, options.tile_strategy);
+        last_stats_.used_auto_tiling = true;
+
+        if (!tile_config.valid) {
+            last_error_ = "Tile optimization failed: " + tile_config.reason;
+            return std::nullopt;
+        }
+    } else {
+        // Use explicit tile sizes from options
+        tile_config.Ti = options.Ti;
+        tile_config.Tj = options.Tj;
+        tile_config.Tk = options.Tk;
+        tile_config.L1_Ki = options.L1_Ki > 0 ? options.L1_Ki : options.Tk;
+        tile_config.valid = true;
+        last_stats_.used_auto_tiling = false;
+    }
+
+    // Store tile sizes in stats
+    last_stats_.selected_Ti = tile_config.Ti;
+    last_stats_.selected_Tj = tile_config.Tj;
+    last_stats_.selected_Tk = tile_config.Tk;
+    last_stats_.selected_L1_Ki = tile_config.L1_Ki;
+
+    // Tile counts (needed for operation counting)
+    record_tile_counts(M, N, K, tile_config);
+
+    // Step 2: Build program configuration
+    isa::OutputStationaryProgramBuilder::Config prog_config =
+        build_program_config(M, N, K, tile_config, options);
+
+    // Step 3: Generate program
+    isa::OutputStationaryProgramBuilder builder(prog_config);
+    isa::DMProgram program = builder.build();
+
+    // Step 4: Count operations and record stats
+    Size elem_size = dtype_size(options.dtype);
+    count_operations(program, elem_size, tile_config);
+
+    // L2 traffic (streaming to L1)
+    last_stats_.estimated_l2_bytes = last_stats_.total_tiles *
+        (tile_config.Ti * tile_config.Tk +
+         tile_config.Tk * tile_config.Tj +
+         tile_config.Ti * tile_config.Tj) * elem_size;
+
+    // Dataflow used
+    last_stats_.dataflow_used = (options.dataflow == DataflowStrategy::AUTO)
+        ? select_dataflow(M, N, K) : options.dataflow;
+
+    return program;
+}
+
 isa::OutputStationaryProgramBuilder::Config KernelCompiler::build_program_config(
     Size M, Size N, Size K,
     const TileOptimizer::TileConfig& tiles,
@@ -473,6 +473,29 @@ isa::OutputStationaryProgramBuilder::Config KernelCompiler::build_program_config
     return config;
 }
 
+void KernelCompiler::record_tile_counts(Size M, Size N, Size K,
+                                        const TileOptimizer::TileConfig& tiles) {
+    auto ceil_div = [](Size a, Size b) { return (a + b - 1) / b; };
+    last_stats_.num_m_tiles = ceil_div(M, tiles.Ti);
+    last_stats_.num_n_tiles = ceil_div(N, tiles.Tj);
+    last_stats_.num_k_tiles = ceil_div(K, tiles.Tk);
+    last_stats_.total_tiles = last_stats_.num_m_tiles *
+                              last_stats_.num_n_tiles *
+                              last_stats_.num_k_tiles;
+}
+
+void KernelCompiler::classify_regime(const CompileOptions& options) {
+    double peak_flops_per_cycle =
+        2.0 * static_cast<double>(options.systolic_size * options.systolic_size);
+    double peak_bytes_per_cycle =
+        static_cast<double>(last_stats_.operations.pipeline.external_peak_bw);
+
+    last_stats_.machine_balance = peak_flops_per_cycle / peak_bytes_per_cycle;
+    last_stats_.regime =
+        (last_stats_.estimated_arithmetic_intensity >= last_stats_.machine_balance)
+        ? ExecutionRegime::COMPUTE_BOUND : ExecutionRegime::MEMORY_BOUND;
+}
+
 DataflowStrategy KernelCompiler::select_dataflow(Size M, Size N, Size K) const {
     // Heuristic for dataflow selection:
     // - Output-stationary: balanced M, N, K (general purpose)
@@ -245,21 +245,21 @@ void Kernel::setup_matmul_arguments() {
 
     // Input A: [M, K]
     arguments_.emplace_back(
-        "A", dtype_,
+        ArgRole::A, dtype_,
         std::vector<Size>{M(), K()},
         false  // is_output = false
     );
 
     // Input B: [K, N]
     arguments_.emplace_back(
-        "B", dtype_,
+        ArgRole::B, dtype_,
         std::vector<Size>{K(), N()},
         false
     );
 
     // Output C: [M, N]
     arguments_.emplace_back(
-        "C", dtype_,
+        ArgRole::C, dtype_,
         std::vector<Size>{M(), N()},
         true   // is_output = true
     );
@@ -270,14 +270,14 @@ void Kernel::setup_mlp_arguments() {
 
     // Input A: [M, K]
     arguments_.emplace_back(
-        "A", dtype_,
+        ArgRole::A, dtype_,
         std::vector<Size>{M(), K()},
         false
     );
 
     // Input B (weights): [K, N]
     arguments_.emplace_back(
-        "B", dtype_,
+        ArgRole::B, dtype_,
         std::vector<Size>{K(), N()},
         false
     );
@@ -285,7 +285,7 @@ void Kernel::setup_mlp_arguments() {
     // Bias: [N] (if enabled)
     if (has_bias_) {
         arguments_.emplace_back(
-            "bias", dtype_,
+            ArgRole::BIAS, dtype_,
             std::vector<Size>{N()},
             false
         );
@@ -293,7 +293,7 @@ void Kernel::setup_mlp_arguments() {
 
     // Output C: [M, N]
     arguments_.emplace_back(
-        "C", dtype_,
+        ArgRole::C, dtype_,
         std::vector<Size>{M(), N()},
         true
     );
@@ -2,15 +2,121 @@
 // Multi-kernel DAG representation and compilation
 
 #include <sw/kpu/kernel_graph.hpp>
+#include <sw/kpu/isa/program_serializer.hpp>
 
 #include <algorithm>
-#include <queue>
+#include <charconv>
+#include <list>
+#include <map>
+#include <mutex>
+#include <numeric>
 #include <sstream>
 #include <stdexcept>
+#include <string_view>
+#include <tuple>
 #include <iomanip>
 
 namespace sw::kpu {
 
+namespace {
+
+// FNV-1a over the bytes of a structural key
+constexpr uint64_t kFnvOffsetBasis = 14695981039346656037ull;
+constexpr uint64_t kFnvPrime = 1099511628211ull;
+
+// Append an unsigned integer in decimal without a stream
+void append_decimal(std::string& out, uint64_t value) {
+    char buf[20];
+    char* end = std::to_chars(buf, buf + sizeof(buf), value).ptr;
+    out.append(buf, end);
+}
+
+uint64_t hash_bytes(std::string_view bytes) {
+    uint64_t h = kFnvOffsetBasis;
+    for (unsigned char c : bytes) {
+        h ^= c;
+        h *= kFnvPrime;
+    }
+    return h;
+}
+
+// Structural keys are flat byte strings: integers as 8 little-endian
+// bytes, strings and blobs length-prefixed so fields cannot run together
+void key_append(std::string& key, uint64_t value) {
+    for (int i = 0; i < 8; ++i) {
+        key.push_back(static_cast<char>((value >> (i * 8)) & 0xff));
+    }
+}
+
+void key_append(std::string& key, std::string_view bytes) {
+    key_append(key, bytes.size());
+    key.append(bytes);
+}
+
+/**
+ * Small LRU of successful compile() results shared by all graphs.
+ *
+ * Entries are indexed by the hash of their structural key, but a lookup
+ * only hits when the full key matches, so hash collisions never return
+ * another graph's program.
+ */
+class CompileResultCache {
+public:
+    static constexpr size_t kCapacity = 32;
+
+    std::optional<KernelGraphCompileResult> find(uint64_t hash, const std::string& key,
+                                                 const std::string& options_key) {
+        std::lock_guard<std::mutex> lock(mutex_);
+        auto it = index_.find(hash);
+        if (it == index_.end() || it->second->options_key != options_key ||
+            it->second->key != key) {
+            return std::nullopt;
+        }
+        entries_.splice(entries_.begin(), entries_, it->second);
+        return it->second->result;
+    }
+
+    void insert(uint64_t hash, std::string key, std::string options_key,
+                const KernelGraphCompileResult& result) {
+        std::lock_guard<std::mutex> lock(mutex_);
+        auto it = index_.find(hash);
+        if (it != index_.end()) {
+            entries_.erase(it->second);
+            index_.erase(it);
+        }
+        entries_.push_front(Entry{hash, std::move(key), std::move(options_key), result});
+        index_[hash] = entries_.begin();
+        if (entries_.size() > kCapacity) {
+            index_.erase(entries_.back().hash);
+            entries_.pop_back();
+        }
+    }
+
+    void clear() {
+        std::lock_guard<std::mutex> lock(mutex_);
+        index_.clear();
+        entries_.clear();
+    }
+
+private:
+    struct Entry {
+        uint64_t hash;
+        std::string key;
+        std::string options_key;
+        KernelGraphCompileResult result;
+    };
+    std::mutex mutex_;
+    std::list<Entry> entries_;
+    std::unordered_map<uint64_t, std::list<Entry>::iterator> index_;
+};
+
+CompileResultCache& compile_cache() {
+    static CompileResultCache cache;
+    return cache;
+}
+
+} // anonymous namespace
+
 // ============================================================================
 // Constructors
 // ============================================================================
@@ -27,33 +133,43 @@ size_t KernelGraph::add_kernel(Kernel kernel, const std::string& name) {
 }
 
 size_t KernelGraph::add_kernel(std::unique_ptr<Kernel> kernel, const std::string& name) {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
     if (!kernel || !kernel->is_valid()) {
         throw std::invalid_argument("Cannot add invalid kernel to graph");
     }
 
-    size_t id = next_node_id_++;
+    size_t id = nodes_.size();
     std::string node_name = name.empty() ? kernel->name() : name;
 
-    nodes_.emplace(id, KernelNode(id, std::move(kernel), std::move(node_name)));
+    nodes_.emplace_back(id, std::move(kernel), std::move(node_name));
     invalidate_cache();
 
     return id;
 }
 
+void KernelGraph::reserve(size_t num_nodes, size_t num_edges) {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+    nodes_.reserve(num_nodes);
+    edges_.reserve(num_edges);
+}
+
 const KernelNode& KernelGraph::get_node(size_t node_id) const {
-    auto it = nodes_.find(node_id);
-    if (it == nodes_.end()) {
+    if (node_id >= nodes_.size()) {
         throw std::out_of_range("Node ID " + std::to_string(node_id) + " not found");
     }
-    return it->second;
+    return nodes_[node_id];
 }
 
 KernelNode& KernelGraph::get_node(size_t node_id) {
-    auto it = nodes_.find(node_id);
-    if (it == nodes_.end()) {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+    if (node_id >= nodes_.size()) {
         throw std::out_of_range("Node ID " + std::to_string(node_id) + " not found");
     }
-    return it->second;
+    // The caller may edit the kernel in place, so the structural key has
+    // to be rebuilt
+    cached_structural_key_.reset();
+    cached_structural_hash_.reset();
+    return nodes_[node_id];
 }
 
 const Kernel& KernelGraph::get_kernel(size_t node_id) const {
@@ -65,16 +181,13 @@ Kernel& KernelGraph::get_kernel(size_t node_id) {
 }
 
 bool KernelGraph::has_node(size_t node_id) const {
-    return nodes_.find(node_id) != nodes_.end();
+    return node_id < nodes_.size();
 }
 
 std::vector<size_t> KernelGraph::node_ids() const {
-    std::vector<size_t> ids;
-    ids.reserve(nodes_.size());
-    for (const auto& [id, node] : nodes_) {
-        ids.push_back(id);
-    }
-    std::sort(ids.begin(), ids.end());
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+    std::vector<size_t> ids(nodes_.size());
+    std::iota(ids.begin(), ids.end(), size_t{0});
     return ids;
 }
 
@@ -85,6 +198,7 @@ std::vector<size_t> KernelGraph::node_ids() const {
 size_t KernelGraph::add_edge(size_t from_node, size_t to_node,
                              const std::string& output_name,
                              const std::string& input_name) {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
     // Validate nodes exist
     if (!has_node(from_node)) {
         throw std::invalid_argument("Source node " + std::to_string(from_node) + " not found");
@@ -103,11 +217,65 @@ size_t KernelGraph::add_edge(size_t from_node, size_t to_node,
         throw std::invalid_argument("Edge would create a cycle in the graph");
     }
 
-    // Calculate tensor size from producer's output
+    size_t edge_id = append_edge(from_node, to_node, output_name, input_name);
+    invalidate_cache();
+    return edge_id;
+}
+
+std::vector<size_t> KernelGraph::add_edges(
+    const std::vector<std::tuple<size_t, size_t, std::string, std::string>>& edges) {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+    // Validate everything before touching the graph
+    const size_t num = nodes_.size();
+    for (const auto& [from, to, output_name, input_name] : edges) {
+        if (!has_node(from)) {
+            throw std::invalid_argument("Source node " + std::to_string(from) + " not found");
+        }
+        if (!has_node(to)) {
+            throw std::invalid_argument("Target node " + std::to_string(to) + " not found");
+        }
+        if (from == to) {
+            throw std::invalid_argument("Self-loops are not allowed");
+        }
+    }
+
+    // Sort the existing edges plus the batch; anything left unvisited is
+    // on a cycle
+    std::vector<std::pair<size_t, size_t>> pairs;
+    pairs.reserve(edges_.size() + edges.size());
+    for (const auto& edge : edges_) {
+        pairs.emplace_back(edge.from_node, edge.to_node);
+    }
+    for (const auto& [from, to, output_name, input_name] : edges) {
+        pairs.emplace_back(from, to);
+    }
+    if (topological_order(pack_edges(num, pairs)).size() != num) {
+        throw std::invalid_argument("Edges would create a cycle in the graph");
+    }
+
+    // Commit the batch
+    edges_.reserve(edges_.size() + edges.size());
+    std::vector<size_t> ids;
+    ids.reserve(edges.size());
+    for (const auto& [from, to, output_name, input_name] : edges) {
+        ids.push_back(append_edge(from, to, output_name, input_name));
+    }
+
+    invalidate_cache();
+    return ids;
+}
+
+size_t KernelGraph::append_edge(size_t from_node, size_t to_node,
+                                const std::string& output_name,
+                                const std::string& input_name) {
+    // Calculate tensor size from producer's output; standard operands are
+    // matched by role, only custom names need a string comparison
     const Kernel& producer = get_kernel(from_node);
+    const ArgRole output_role = arg_role_from_name(output_name);
     Size tensor_size = 0;
     for (const auto& arg : producer.arguments()) {
-        if (arg.name == output_name && arg.is_output) {
+        if (arg.role() == output_role && arg.is_output &&
+            (output_role != ArgRole::CUSTOM || arg.name == output_name)) {
             tensor_size = arg.size_bytes;
             break;
         }
@@ -117,10 +285,9 @@ size_t KernelGraph::add_edge(size_t from_node, size_t to_node,
     edges_.emplace_back(from_node, to_node, output_name, input_name, tensor_size);
 
     // Update node edge lists
-    nodes_.at(from_node).output_edges.push_back(edge_id);
-    nodes_.at(to_node).input_edges.push_back(edge_id);
+    nodes_[from_node].output_edges.push_back(edge_id);
+    nodes_[to_node].input_edges.push_back(edge_id);
 
-    invalidate_cache();
     return edge_id;
 }
 
@@ -134,23 +301,43 @@ const KernelEdge& KernelGraph::get_edge(size_t edge_id) const {
 bool KernelGraph::would_create_cycle(size_t from_node, size_t to_node) const {
     // If there's already a path from to_node to from_node, adding
     // from_node -> to_node would create a cycle
-    std::unordered_set<size_t> visited;
-    return has_path_dfs(to_node, from_node, visited);
+    return has_path(to_node, from_node);
 }
 
-bool KernelGraph::has_path_dfs(size_t from, size_t to,
-                               std::unordered_set<size_t>& visited) const {
+bool KernelGraph::has_path(size_t from, size_t to) const {
     if (from == to) return true;
-    if (visited.count(from)) return false;
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+    if (!has_node(from) || !has_node(to)) return false;
 
-    visited.insert(from);
-
-    auto it = nodes_.find(from);
-    if (it == nodes_.end()) return false;
+    // A sink can't reach anything and a source can't be reached
+    if (nodes_[from].output_edges.empty() ||
+        nodes_[to].input_edges.empty()) {
+        return false;
+    }
 
-    for (size_t edge_id : it->second.output_edges) {
-        if (has_path_dfs(edges_[edge_id].to_node, to, visited)) {
-            return true;
+    // Breadth-first search with one visited bit per node; each node is
+    // queued at most once, so a query is O(V+E) with a V/64-word set
+    reached_.assign((nodes_.size() + 63) / 64, 0);
+    frontier_.clear();
+
+    auto visit = [this](size_t id) {
+        uint64_t bit = uint64_t{1} << (id % 64);
+        uint64_t& word = reached_[id / 64];
+        if (word & bit) return false;
+        word |= bit;
+        return true;
+    };
+
+    visit(from);
+    frontier_.push_back(from);
+
+    for (size_t head = 0; head < frontier_.size(); ++head) {
+        for (size_t edge_id : nodes_[frontier_[head]].output_edges) {
+            size_t succ = edges_[edge_id].to_node;
+            if (succ == to) return true;
+            if (visit(succ)) {
+                frontier_.push_back(succ);
+            }
         }
     }
 
@@ -158,20 +345,81 @@ bool KernelGraph::has_path_dfs(size_t from, size_t to,
 }
 
 std::vector<size_t> KernelGraph::outgoing_edges(size_t node_id) const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
     if (!has_node(node_id)) return {};
     return get_node(node_id).output_edges;
 }
 
 std::vector<size_t> KernelGraph::incoming_edges(size_t node_id) const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
     if (!has_node(node_id)) return {};
     return get_node(node_id).input_edges;
 }
 
+// ============================================================================
+// Bulk Construction
+// ============================================================================
+
+std::vector<size_t> KernelGraph::build_batch(
+    std::vector<std::pair<Kernel, std::string>> nodes,
+    const std::vector<std::tuple<size_t, size_t, std::string, std::string>>& edges) {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+    const size_t count = nodes.size();
+
+    // Validate everything before touching the graph
+    for (const auto& [kernel, name] : nodes) {
+        if (!kernel.is_valid()) {
+            throw std::invalid_argument("Cannot add invalid kernel to graph");
+        }
+    }
+
+    std::vector<std::pair<size_t, size_t>> pairs;
+    pairs.reserve(edges.size());
+    for (const auto& [from, to, output_name, input_name] : edges) {
+        if (from >= count) {
+            throw std::invalid_argument("Source index " + std::to_string(from) + " out of range");
+        }
+        if (to >= count) {
+            throw std::invalid_argument("Target index " + std::to_string(to) + " out of range");
+        }
+        if (from == to) {
+            throw std::invalid_argument("Self-loops are not allowed");
+        }
+        pairs.emplace_back(from, to);
+    }
+
+    // Sort the batch on its own; anything left unvisited is on a cycle
+    if (topological_order(pack_edges(count, pairs)).size() != count) {
+        throw std::invalid_argument("Edges would create a cycle in the graph");
+    }
+
+    // Commit the batch
+    const size_t base = nodes_.size();
+    reserve(base + count, edges_.size() + edges.size());
+
+    std::vector<size_t> ids;
+    ids.reserve(count);
+    for (auto& [kernel, name] : nodes) {
+        size_t id = nodes_.size();
+        std::string node_name = name.empty() ? kernel.name() : std::move(name);
+        nodes_.emplace_back(id, std::make_unique<Kernel>(std::move(kernel)), std::move(node_name));
+        ids.push_back(id);
+    }
+
+    for (const auto& [from, to, output_name, input_name] : edges) {
+        append_edge(base + from, base + to, output_name, input_name);
+    }
+
+    invalidate_cache();
+    return ids;
+}
+
 // ============================================================================
 // Graph Properties
 // ============================================================================
 
 bool KernelGraph::validate(std::string& error) const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
     if (nodes_.empty()) {
         error = "Graph is empty";
         return false;
@@ -199,9 +447,9 @@ bool KernelGraph::validate(std::string& error) const {
     }
 
     // Check all kernels are valid
-    for (const auto& [id, node] : nodes_) {
+    for (const auto& node : nodes_) {
         if (!node.kernel || !node.kernel->is_valid()) {
-            error = "Node " + std::to_string(id) + " has invalid kernel";
+            error = "Node " + std::to_string(node.id) + " has invalid kernel";
             return false;
         }
     }
@@ -210,28 +458,41 @@ bool KernelGraph::validate(std::string& error) const {
 }
 
 std::vector<size_t> KernelGraph::input_nodes() const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+    if (cached_input_nodes_.has_value()) {
+        return *cached_input_nodes_;
+    }
+
     std::vector<size_t> inputs;
-    for (const auto& [id, node] : nodes_) {
+    for (const auto& node : nodes_) {
         if (node.input_edges.empty()) {
-            inputs.push_back(id);
+            inputs.push_back(node.id);
         }
     }
-    std::sort(inputs.begin(), inputs.end());
+
+    cached_input_nodes_ = inputs;
     return inputs;
 }
 
 std::vector<size_t> KernelGraph::output_nodes() const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+    if (cached_output_nodes_.has_value()) {
+        return *cached_output_nodes_;
+    }
+
     std::vector<size_t> outputs;
-    for (const auto& [id, node] : nodes_) {
+    for (const auto& node : nodes_) {
         if (node.output_edges.empty()) {
-            outputs.push_back(id);
+            outputs.push_back(node.id);
         }
     }
-    std::sort(outputs.begin(), outputs.end());
+
+    cached_output_nodes_ = outputs;
     return outputs;
 }
 
 KernelGraphStats KernelGraph::compute_stats() const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
     KernelGraphStats stats;
 
     stats.num_nodes = nodes_.size();
@@ -239,26 +500,20 @@ KernelGraphStats KernelGraph::compute_stats() const {
     stats.num_input_nodes = input_nodes().size();
     stats.num_output_nodes = output_nodes().size();
 
-    // Calculate depths and find max
-    std::unordered_map<size_t, size_t> depths;
-    for (const auto& [id, node] : nodes_) {
-        size_t depth = calculate_node_depth(id, depths);
-        stats.max_depth = std::max(stats.max_depth, depth);
-    }
+    stats.max_depth = nodes_.empty() ? 0 : resolve_dag().max_level;
 
-    // Aggregate kernel stats
+    // Kernel totals are summed from the current kernels rather than kept
+    // as running totals, since get_kernel() hands out mutable references
     double total_intensity = 0.0;
-    for (const auto& [id, node] : nodes_) {
-        if (node.kernel) {
-            stats.total_instructions += node.kernel->instruction_count();
-            stats.total_flops += node.kernel->total_flops();
-            stats.total_input_bytes += node.kernel->total_input_bytes();
-            stats.total_output_bytes += node.kernel->total_output_bytes();
-            total_intensity += node.kernel->arithmetic_intensity();
-        }
+    for (const auto& node : nodes_) {
+        stats.total_instructions += node.kernel->instruction_count();
+        stats.total_flops += node.kernel->total_flops();
+        stats.total_input_bytes += node.kernel->total_input_bytes();
+        stats.total_output_bytes += node.kernel->total_output_bytes();
+        total_intensity += node.kernel->arithmetic_intensity();
     }
 
-    // Calculate intermediate data (data passed between kernels)
+    // Data passed between kernels
     for (const auto& edge : edges_) {
         stats.intermediate_bytes += edge.tensor_size_bytes;
     }
@@ -270,65 +525,273 @@ KernelGraphStats KernelGraph::compute_stats() const {
     return stats;
 }
 
-size_t KernelGraph::calculate_node_depth(size_t node_id,
-                                         std::unordered_map<size_t, size_t>& depths) const {
-    auto it = depths.find(node_id);
-    if (it != depths.end()) return it->second;
+KernelGraphAnalysis KernelGraph::analyze() const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+    KernelGraphAnalysis analysis;
+
+    if (nodes_.empty()) {
+        analysis.error_message = "Graph is empty";
+        return analysis;
+    }
+
+    // Check all edges reference valid nodes
+    for (size_t i = 0; i < edges_.size(); ++i) {
+        const auto& edge = edges_[i];
+        if (!has_node(edge.from_node)) {
+            analysis.error_message = "Edge " + std::to_string(i) + " references invalid source node";
+            return analysis;
+        }
+        if (!has_node(edge.to_node)) {
+            analysis.error_message = "Edge " + std::to_string(i) + " references invalid target node";
+            return analysis;
+        }
+    }
+
+    auto& stats = analysis.stats;
+    stats.num_nodes = nodes_.size();
+    stats.num_edges = edges_.size();
+
+    // Depths, statistics and fusion candidates are accumulated in one
+    // sweep over the execution order
+    const Adjacency& adj = adjacency();
+    auto& order = analysis.execution_order;
+    order = topological_order(adj);
+    if (order.size() != nodes_.size()) {
+        KernelGraphAnalysis invalid;
+        invalid.error_message = "Graph contains cycles";
+        return invalid;
+    }
+
+    std::vector<size_t> depths(nodes_.size(), 0);
+    double total_intensity = 0.0;
+
+    for (size_t node_id : order) {
+        const auto& node = get_node(node_id);
+        if (!node.kernel || !node.kernel->is_valid()) {
+            // Only valid and error_message are reported for an invalid graph
+            KernelGraphAnalysis invalid;
+            invalid.error_message = "Node " + std::to_string(node_id) + " has invalid kernel";
+            return invalid;
+        }
 
-    const auto& node = get_node(node_id);
-    if (node.input_edges.empty()) {
-        depths[node_id] = 0;
-        return 0;
+        size_t depth = depths[node_id];
+        stats.max_depth = std::max(stats.max_depth, depth);
+        if (node.input_edges.empty()) ++stats.num_input_nodes;
+        if (node.output_edges.empty()) ++stats.num_output_nodes;
+
+        stats.total_instructions += node.kernel->instruction_count();
+        stats.total_flops += node.kernel->total_flops();
+        stats.total_input_bytes += node.kernel->total_input_bytes();
+        stats.total_output_bytes += node.kernel->total_output_bytes();
+        total_intensity += node.kernel->arithmetic_intensity();
+
+        collect_shared_input_groups(node, analysis.shared_input_groups);
+
+        for (uint32_t i = adj.out_row_ptr[node_id]; i < adj.out_row_ptr[node_id + 1]; ++i) {
+            size_t target = adj.out_col_idx[i];
+            stats.intermediate_bytes += edges_[adj.out_edge_idx[i]].tensor_size_bytes;
+            depths[target] = std::max(depths[target], depth + 1);
+            if (is_fusible_edge(node, nodes_[target])) {
+                analysis.fusible_pairs.emplace_back(node_id, target);
+            }
+        }
     }
 
-    size_t max_parent_depth = 0;
-    for (size_t edge_id : node.input_edges) {
-        size_t parent_depth = calculate_node_depth(edges_[edge_id].from_node, depths);
-        max_parent_depth = std::max(max_parent_depth, parent_depth);
+    stats.avg_arithmetic_intensity = total_intensity / nodes_.size();
+    // Pairs were found in execution order; report them by producer id
+    // like find_fusible_pairs()
+    std::sort(analysis.fusible_pairs.begin(), analysis.fusible_pairs.end());
+    std::sort(analysis.shared_input_groups.begin(), analysis.shared_input_groups.end());
+
+    analysis.execution_levels.resize(stats.max_depth + 1);
+    for (size_t node_id : order) {
+        analysis.execution_levels[depths[node_id]].push_back(node_id);
+    }
+    for (auto& level : analysis.execution_levels) {
+        std::sort(level.begin(), level.end());
     }
 
-    depths[node_id] = max_parent_depth + 1;
-    return depths[node_id];
+    cached_execution_order_ = order;
+    cached_execution_levels_ = analysis.execution_levels;
+    analysis.valid = true;
+    return analysis;
 }
 
-// ============================================================================
-// Execution Order
-// ============================================================================
+uint64_t KernelGraph::structural_hash() const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+    if (!cached_structural_hash_.has_value()) {
+        cached_structural_hash_ = hash_bytes(structural_key());
+    }
+    return *cached_structural_hash_;
+}
 
-std::vector<size_t> KernelGraph::get_execution_order() const {
-    if (cached_execution_order_.has_value()) {
-        return *cached_execution_order_;
+const std::string& KernelGraph::structural_key() const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+    if (cached_structural_key_.has_value()) {
+        return *cached_structural_key_;
+    }
+
+    std::string key;
+    isa::ProgramSerializer serializer;
+
+    // Node ids are dense, so a node's position in the key is its id
+    key_append(key, nodes_.size());
+    for (const auto& node : nodes_) {
+        const Kernel& kernel = *node.kernel;
+        key_append(key, static_cast<uint64_t>(kernel.op_type()));
+        key_append(key, static_cast<uint64_t>(kernel.dtype()));
+        key_append(key, kernel.M());
+        key_append(key, kernel.N());
+        key_append(key, kernel.K());
+        key_append(key, kernel.Ti());
+        key_append(key, kernel.Tj());
+        key_append(key, kernel.Tk());
+        key_append(key, kernel.program().L1_Ki);
+        key_append(key, static_cast<uint64_t>(kernel.activation()));
+        key_append(key, kernel.has_bias());
+
+        // The full program, so kernels that differ only in their
+        // instructions get different keys
+        std::vector<uint8_t> program = serializer.serialize(kernel.program());
+        key_append(key, std::string_view(reinterpret_cast<const char*>(program.data()),
+                                         program.size()));
+    }
+
+    // Edges sorted so insertion order does not matter
+    std::vector<const KernelEdge*> edges;
+    edges.reserve(edges_.size());
+    for (const auto& edge : edges_) {
+        edges.push_back(&edge);
+    }
+    std::sort(edges.begin(), edges.end(), [](const KernelEdge* a, const KernelEdge* b) {
+        return std::tie(a->from_node, a->to_node, a->output_name, a->input_name) <
+               std::tie(b->from_node, b->to_node, b->output_name, b->input_name);
+    });
+
+    key_append(key, edges.size());
+    for (const KernelEdge* edge : edges) {
+        key_append(key, edge->from_node);
+        key_append(key, edge->to_node);
+        key_append(key, edge->output_name);
+        key_append(key, edge->input_name);
     }
 
-    // Kahn's algorithm for topological sort
-    std::unordered_map<size_t, size_t> in_degree;
-    for (const auto& [id, node] : nodes_) {
-        in_degree[id] = node.input_edges.size();
+    cached_structural_key_ = std::move(key);
+    return *cached_structural_key_;
+}
+
+const KernelGraph::DagResolution& KernelGraph::resolve_dag() const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+    if (cached_resolution_.has_value()) {
+        return *cached_resolution_;
     }
 
-    std::queue<size_t> ready;
-    for (const auto& [id, degree] : in_degree) {
-        if (degree == 0) {
-            ready.push(id);
+    DagResolution dag;
+    dag.level.assign(nodes_.size(), 0);
+    dag.pred.assign(nodes_.size(), DagResolution::kNoNode);
+
+    // Every producer precedes its consumers in execution order, so a
+    // node's level is final by the time it is reached; relax its
+    // out-edges and remember which producer set each consumer's level
+    const Adjacency& adj = adjacency();
+    for (size_t u : get_execution_order()) {
+        size_t level = dag.level[u];
+        if (dag.deepest_node == DagResolution::kNoNode || level > dag.max_level) {
+            dag.max_level = level;
+            dag.deepest_node = u;
+        }
+        for (uint32_t i = adj.out_row_ptr[u]; i < adj.out_row_ptr[u + 1]; ++i) {
+            size_t v = adj.out_col_idx[i];
+            if (level + 1 > dag.level[v]) {
+                dag.level[v] = level + 1;
+                dag.pred[v] = u;
+            }
         }
     }
 
-    std::vector<size_t> order;
-    order.reserve(nodes_.size());
+    cached_resolution_ = std::move(dag);
+    return *cached_resolution_;
+}
+
+const KernelGraph::Adjacency& KernelGraph::adjacency() const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+    if (cached_adjacency_.has_value()) {
+        return *cached_adjacency_;
+    }
+
+    std::vector<std::pair<size_t, size_t>> pairs;
+    pairs.reserve(edges_.size());
+    for (const auto& edge : edges_) {
+        pairs.emplace_back(edge.from_node, edge.to_node);
+    }
+    Adjacency adj = pack_edges(nodes_.size(), pairs);
+
+    cached_adjacency_ = std::move(adj);
+    return *cached_adjacency_;
+}
+
+KernelGraph::Adjacency KernelGraph::pack_edges(
+    size_t num_nodes, const std::vector<std::pair<size_t, size_t>>& edges) {
+    Adjacency adj;
+    adj.out_row_ptr.assign(num_nodes + 1, 0);
+    adj.in_row_ptr.assign(num_nodes + 1, 0);
+    for (const auto& [from, to] : edges) {
+        ++adj.out_row_ptr[from + 1];
+        ++adj.in_row_ptr[to + 1];
+    }
+    for (size_t id = 0; id < num_nodes; ++id) {
+        adj.out_row_ptr[id + 1] += adj.out_row_ptr[id];
+        adj.in_row_ptr[id + 1] += adj.in_row_ptr[id];
+    }
+
+    // Counting sort by source keeps each node's edges in list order
+    adj.out_col_idx.resize(edges.size());
+    adj.out_edge_idx.resize(edges.size());
+    std::vector<uint32_t> next(adj.out_row_ptr.begin(), adj.out_row_ptr.end() - 1);
+    for (size_t i = 0; i < edges.size(); ++i) {
+        uint32_t slot = next[edges[i].first]++;
+        adj.out_col_idx[slot] = static_cast<uint32_t>(edges[i].second);
+        adj.out_edge_idx[slot] = static_cast<uint32_t>(i);
+    }
+    return adj;
+}
 
-    while (!ready.empty()) {
-        size_t node_id = ready.front();
-        ready.pop();
-        order.push_back(node_id);
+std::vector<size_t> KernelGraph::topological_order(const Adjacency& adj) {
+    // Kahn's algorithm; the order vector doubles as the FIFO ready queue
+    const size_t num = adj.out_row_ptr.size() - 1;
+    std::vector<uint32_t> in_degree(num);
+    std::vector<size_t> order;
+    order.reserve(num);
+    for (size_t id = 0; id < num; ++id) {
+        in_degree[id] = adj.in_row_ptr[id + 1] - adj.in_row_ptr[id];
+        if (in_degree[id] == 0) {
+            order.push_back(id);
+        }
+    }
 
-        for (size_t edge_id : get_node(node_id).output_edges) {
-            size_t target = edges_[edge_id].to_node;
+    for (size_t head = 0; head < order.size(); ++head) {
+        size_t node_id = order[head];
+        for (uint32_t i = adj.out_row_ptr[node_id]; i < adj.out_row_ptr[node_id + 1]; ++i) {
+            size_t target = adj.out_col_idx[i];
             if (--in_degree[target] == 0) {
-                ready.push(target);
+                order.push_back(target);
             }
         }
     }
+    return order;
+}
+
+// ============================================================================
+// Execution Order
+// ============================================================================
+
+std::vector<size_t> KernelGraph::get_execution_order() const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+    if (cached_execution_order_.has_value()) {
+        return *cached_execution_order_;
+    }
 
+    std::vector<size_t> order = topological_order(adjacency());
     if (order.size() != nodes_.size()) {
         throw std::runtime_error("Graph contains a cycle - topological sort impossible");
     }
@@ -338,71 +801,41 @@ std::vector<size_t> KernelGraph::get_execution_order() const {
 }
 
 std::vector<std::vector<size_t>> KernelGraph::get_execution_levels() const {
-    std::unordered_map<size_t, size_t> depths;
-    size_t max_depth = 0;
-
-    for (const auto& [id, node] : nodes_) {
-        size_t depth = calculate_node_depth(id, depths);
-        max_depth = std::max(max_depth, depth);
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+    if (cached_execution_levels_.has_value()) {
+        return *cached_execution_levels_;
     }
 
-    std::vector<std::vector<size_t>> levels(max_depth + 1);
-    for (const auto& [id, depth] : depths) {
-        levels[depth].push_back(id);
-    }
+    const auto& dag = resolve_dag();
 
-    // Sort each level for determinism
-    for (auto& level : levels) {
-        std::sort(level.begin(), level.end());
+    std::vector<std::vector<size_t>> levels(dag.max_level + 1);
+    // Ascending id order keeps each level sorted
+    for (size_t id = 0; id < nodes_.size(); ++id) {
+        levels[dag.level[id]].push_back(id);
     }
 
+    cached_execution_levels_ = levels;
     return levels;
 }
 
 std::vector<size_t> KernelGraph::get_critical_path() const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
     if (nodes_.empty()) return {};
-
-    std::unordered_map<size_t, size_t> depths;
-    std::unordered_map<size_t, size_t> parent_on_critical;
-
-    // Find depths and track which parent gives max depth
-    size_t max_depth = 0;
-    size_t deepest_node = 0;
-
-    for (const auto& [id, node] : nodes_) {
-        size_t depth = calculate_node_depth(id, depths);
-        if (depth > max_depth) {
-            max_depth = depth;
-            deepest_node = id;
-        }
+    if (cached_critical_path_.has_value()) {
+        return *cached_critical_path_;
     }
 
-    // Reconstruct critical path by backtracking
+    // Walk the longest-path predecessors back from the deepest node
+    const auto& dag = resolve_dag();
     std::vector<size_t> path;
-    size_t current = deepest_node;
-
-    while (true) {
+    for (size_t current = dag.deepest_node; current != DagResolution::kNoNode;
+         current = dag.pred[current]) {
         path.push_back(current);
-        const auto& node = get_node(current);
-
-        if (node.input_edges.empty()) break;
-
-        // Find parent with max depth
-        size_t max_parent_depth = 0;
-        size_t next_node = current;
-        for (size_t edge_id : node.input_edges) {
-            size_t parent = edges_[edge_id].from_node;
-            if (depths[parent] >= max_parent_depth) {
-                max_parent_depth = depths[parent];
-                next_node = parent;
-            }
-        }
-
-        if (next_node == current) break;  // Safety check
-        current = next_node;
     }
 
     std::reverse(path.begin(), path.end());
+
+    cached_critical_path_ = path;
     return path;
 }
 
@@ -411,11 +844,19 @@ std::vector<size_t> KernelGraph::get_critical_path() const {
 // ============================================================================
 
 std::vector<std::pair<size_t, size_t>> KernelGraph::find_fusible_pairs() const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
     std::vector<std::pair<size_t, size_t>> pairs;
 
-    for (const auto& edge : edges_) {
-        if (can_fuse(edge.from_node, edge.to_node)) {
-            pairs.emplace_back(edge.from_node, edge.to_node);
+    // Only a producer with a single out-edge can fuse, so one scan of the
+    // CSR rows finds every candidate edge; the kernel checks do the rest
+    const Adjacency& adj = adjacency();
+    for (size_t producer = 0; producer < nodes_.size(); ++producer) {
+        uint32_t row = adj.out_row_ptr[producer];
+        if (adj.out_row_ptr[producer + 1] - row != 1) continue;
+
+        size_t consumer = adj.out_col_idx[row];
+        if (is_fusible_edge(nodes_[producer], nodes_[consumer])) {
+            pairs.emplace_back(producer, consumer);
         }
     }
 
@@ -423,15 +864,13 @@ std::vector<std::pair<size_t, size_t>> KernelGraph::find_fusible_pairs() const {
 }
 
 bool KernelGraph::can_fuse(size_t producer, size_t consumer) const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
     if (!has_node(producer) || !has_node(consumer)) return false;
 
     const auto& prod_node = get_node(producer);
     const auto& cons_node = get_node(consumer);
 
-    // Consumer must have exactly one input from this producer
-    if (cons_node.input_edges.size() != 1) return false;
-
-    // Producer must have exactly one output going to this consumer
+    // Producer must have an edge going to this consumer
     bool has_edge_to_consumer = false;
     for (size_t edge_id : prod_node.output_edges) {
         if (edges_[edge_id].to_node == consumer) {
@@ -440,6 +879,16 @@ bool KernelGraph::can_fuse(size_t producer, size_t consumer) const {
     }
     if (!has_edge_to_consumer) return false;
 
+    return is_fusible_edge(prod_node, cons_node);
+}
+
+bool KernelGraph::is_fusible_edge(const KernelNode& prod_node,
+                                  const KernelNode& cons_node) const {
+    // Chain fusion: the producer feeds only this consumer and the
+    // consumer reads only from this producer
+    if (prod_node.output_edges.size() != 1) return false;
+    if (cons_node.input_edges.size() != 1) return false;
+
     // Check data type compatibility
     if (prod_node.kernel->dtype() != cons_node.kernel->dtype()) return false;
 
@@ -457,7 +906,47 @@ bool KernelGraph::can_fuse(size_t producer, size_t consumer) const {
     return true;
 }
 
+std::vector<std::vector<size_t>> KernelGraph::find_shared_input_groups() const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+    std::vector<std::vector<size_t>> groups;
+
+    for (size_t producer : node_ids()) {
+        collect_shared_input_groups(get_node(producer), groups);
+    }
+    std::sort(groups.begin(), groups.end());
+
+    return groups;
+}
+
+void KernelGraph::collect_shared_input_groups(
+    const KernelNode& producer, std::vector<std::vector<size_t>>& groups) const {
+
+    if (producer.output_edges.size() < 2) return;
+
+    // Consumers of this producer keyed by (output, M, K, dtype)
+    std::map<std::tuple<std::string, Size, Size, DataType>, std::vector<size_t>> siblings;
+    for (size_t edge_id : producer.output_edges) {
+        const auto& edge = edges_[edge_id];
+        if (edge.input_name != "A") continue;
+
+        const Kernel& kernel = *get_node(edge.to_node).kernel;
+        if (kernel.op_type() != KernelOpType::MATMUL &&
+            kernel.op_type() != KernelOpType::MLP) continue;
+
+        siblings[{edge.output_name, kernel.M(), kernel.K(), kernel.dtype()}]
+            .push_back(edge.to_node);
+    }
+
+    for (auto& [key, members] : siblings) {
+        if (members.size() > 1) {
+            std::sort(members.begin(), members.end());
+            groups.push_back(std::move(members));
+        }
+    }
+}
+
 bool KernelGraph::mark_for_fusion(size_t producer, size_t consumer) {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
     if (!can_fuse(producer, consumer)) return false;
 
     auto& prod_node = get_node(producer);
@@ -472,7 +961,8 @@ bool KernelGraph::mark_for_fusion(size_t producer, size_t consumer) {
 }
 
 void KernelGraph::clear_fusion_marks() {
-    for (auto& [id, node] : nodes_) {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+    for (auto& node : nodes_) {
         node.is_fused = false;
         node.fused_with = SIZE_MAX;
     }
@@ -484,6 +974,39 @@ void KernelGraph::clear_fusion_marks() {
 
 KernelGraphCompileResult KernelGraph::compile(
     const KernelGraphCompileOptions& options) const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+
+    // The structural key and hash are memoized, so a hit only hashes the
+    // options and compares the stored key
+    std::string options_key;
+    key_append(options_key, structural_hash());
+    key_append(options_key, static_cast<uint64_t>(options.fusion_strategy));
+    key_append(options_key, options.enable_double_buffering);
+    key_append(options_key, options.optimize_memory_allocation);
+    key_append(options_key, options.insert_global_barriers);
+    key_append(options_key, options.workspace_limit);
+    const uint64_t hash = hash_bytes(options_key);
+    const std::string& key = structural_key();
+
+    if (auto cached = compile_cache().find(hash, key, options_key)) {
+        // The graph name is not part of the hash
+        cached->program.name = name_.empty() ? "kernel_graph" : name_;
+        return std::move(*cached);
+    }
+
+    KernelGraphCompileResult result = compile_uncached(options);
+    if (result.success) {
+        compile_cache().insert(hash, key, std::move(options_key), result);
+    }
+    return result;
+}
+
+void KernelGraph::clear_compile_cache() {
+    compile_cache().clear();
+}
+
+KernelGraphCompileResult KernelGraph::compile_uncached(
+    const KernelGraphCompileOptions& options) const {
 
     KernelGraphCompileResult result;
 
@@ -515,6 +1038,7 @@ KernelGraphCompileResult KernelGraph::compile(
 }
 
 KernelGraphCompileResult KernelGraph::compile_sequential() const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
     KernelGraphCompileResult result;
 
     std::string error;
@@ -623,10 +1147,20 @@ void KernelGraph::compile_fused_pair(isa::DMProgram& target,
 // ============================================================================
 
 void KernelGraph::invalidate_cache() {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
     cached_execution_order_.reset();
+    cached_resolution_.reset();
+    cached_adjacency_.reset();
+    cached_execution_levels_.reset();
+    cached_critical_path_.reset();
+    cached_input_nodes_.reset();
+    cached_output_nodes_.reset();
+    cached_structural_key_.reset();
+    cached_structural_hash_.reset();
 }
 
 std::string KernelGraph::summary() const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
     std::ostringstream oss;
 
     oss << "=== Kernel Graph";
@@ -652,8 +1186,8 @@ std::string KernelGraph::summary() const {
     oss << "\n";
 
     oss << "Kernels:\n";
-    for (const auto& [id, node] : nodes_) {
-        oss << "  [" << id << "] " << node.name << " ("
+    for (const auto& node : nodes_) {
+        oss << "  [" << node.id << "] " << node.name << " ("
             << kernel_op_type_name(node.kernel->op_type()) << ")\n";
         oss << "       Dims: " << node.kernel->M() << "x"
             << node.kernel->N() << "x" << node.kernel->K() << "\n";
@@ -675,44 +1209,82 @@ std::string KernelGraph::summary() const {
     return oss.str();
 }
 
-std::string KernelGraph::to_dot(bool show_tensor_sizes) const {
-    std::ostringstream oss;
-
-    oss << "digraph KernelGraph {\n";
-    oss << "  rankdir=TB;\n";
-    oss << "  node [shape=box, style=rounded];\n\n";
+template <typename Flush>
+void KernelGraph::append_dot(std::string& out, bool show_tensor_sizes, Flush flush) const {
+    std::lock_guard<std::recursive_mutex> lock(cache_mutex_);
+    out += "digraph KernelGraph {\n";
+    out += "  rankdir=TB;\n";
+    out += "  node [shape=box, style=rounded];\n\n";
+    flush(out);
 
     // Nodes
-    for (const auto& [id, node] : nodes_) {
-        oss << "  node" << id << " [label=\"" << node.name << "\\n"
-            << kernel_op_type_name(node.kernel->op_type()) << "\\n"
-            << node.kernel->M() << "x" << node.kernel->N() << "x"
-            << node.kernel->K() << "\"];\n";
+    for (const auto& node : nodes_) {
+        out += "  node";
+        append_decimal(out, node.id);
+        out += " [label=\"";
+        out += node.name;
+        out += "\\n";
+        out += kernel_op_type_name(node.kernel->op_type());
+        out += "\\n";
+        append_decimal(out, node.kernel->M());
+        out += 'x';
+        append_decimal(out, node.kernel->N());
+        out += 'x';
+        append_decimal(out, node.kernel->K());
+        out += "\"];\n";
+        flush(out);
     }
 
-    oss << "\n";
+    out += '\n';
 
     // Edges
-    for (size_t i = 0; i < edges_.size(); ++i) {
-        const auto& edge = edges_[i];
-        oss << "  node" << edge.from_node << " -> node" << edge.to_node;
+    for (const auto& edge : edges_) {
+        out += "  node";
+        append_decimal(out, edge.from_node);
+        out += " -> node";
+        append_decimal(out, edge.to_node);
         if (show_tensor_sizes && edge.tensor_size_bytes > 0) {
-            oss << " [label=\"" << edge.output_name << "->" << edge.input_name;
+            out += " [label=\"";
+            out += edge.output_name;
+            out += "->";
+            out += edge.input_name;
+            out += " (";
             if (edge.tensor_size_bytes >= 1024 * 1024) {
-                oss << " (" << (edge.tensor_size_bytes / (1024 * 1024)) << " MB)";
+                append_decimal(out, edge.tensor_size_bytes / (1024 * 1024));
+                out += " MB)";
             } else if (edge.tensor_size_bytes >= 1024) {
-                oss << " (" << (edge.tensor_size_bytes / 1024) << " KB)";
+                append_decimal(out, edge.tensor_size_bytes / 1024);
+                out += " KB)";
             } else {
-                oss << " (" << edge.tensor_size_bytes << " B)";
+                append_decimal(out, edge.tensor_size_bytes);
+                out += " B)";
             }
-            oss << "\"]";
+            out += "\"]";
         }
-        oss << ";\n";
+        out += ";\n";
+        flush(out);
     }
 
-    oss << "}\n";
+    out += "}\n";
+    flush(out);
+}
 
-    return oss.str();
+std::string KernelGraph::to_dot(bool show_tensor_sizes) const {
+    // Rough per-line estimate so the buffer is allocated once
+    std::string out;
+    out.reserve(96 + 64 * nodes_.size() + 48 * edges_.size());
+    append_dot(out, show_tensor_sizes, [](std::string&) {});
+    return out;
+}
+
+void KernelGraph::write_dot(std::ostream& os, bool show_tensor_sizes) const {
+    // Stream line by line through one reused buffer, so memory stays
+    // O(longest line) however large the graph is
+    std::string line;
+    append_dot(line, show_tensor_sizes, [&os](std::string& buf) {
+        os.write(buf.data(), static_cast<std::streamsize>(buf.size()));
+        buf.clear();
+    });
 }
 
 } // namespace sw::kpu
@@ -58,6 +58,22 @@ TEST_CASE("KernelArgument construction", "[kernel]") {
         KernelArgument i8("A", DataType::INT8, {100, 100}, false);
         REQUIRE(i8.size_bytes == 100 * 100 * 1);
     }
+
+    SECTION("Role follows the argument name") {
+        REQUIRE(KernelArgument().role() == ArgRole::CUSTOM);
+        REQUIRE(KernelArgument("B", DataType::FLOAT32, {4, 4}).role() == ArgRole::B);
+        REQUIRE(KernelArgument("bias", DataType::FLOAT32, {4}).role() == ArgRole::BIAS);
+        REQUIRE(KernelArgument("scale", DataType::FLOAT32, {4}).role() == ArgRole::CUSTOM);
+
+        KernelArgument out(ArgRole::C, DataType::FLOAT32, {8, 8}, true);
+        REQUIRE(out.name == "C");
+        REQUIRE(out.size_bytes == 8 * 8 * 4);
+
+        out.name = "result";
+        REQUIRE(out.role() == ArgRole::CUSTOM);
+        out.name = "A";
+        REQUIRE(out.role() == ArgRole::A);
+    }
 }
 
 // ============================================================================
@@ -290,6 +306,16 @@ TEST_CASE("CompileOptions construction", "[kernel_compiler]") {
         REQUIRE(opts.dataflow == DataflowStrategy::OUTPUT_STATIONARY);
     }
 
+    SECTION("Explicit tiles record derived tile counts") {
+        KernelCompiler compiler;
+        compiler.compile_matmul(256, 512, 256, CompileOptions::with_tiles(64, 64, 128));
+        const auto& stats = compiler.last_stats();
+        REQUIRE(stats.num_m_tiles == 4);
+        REQUIRE(stats.num_n_tiles == 8);
+        REQUIRE(stats.num_k_tiles == 2);
+        REQUIRE(stats.total_tiles == 64);
+    }
+
     SECTION("Inference options") {
         CompileOptions opts = CompileOptions::for_inference();
         REQUIRE(opts.dataflow == DataflowStrategy::WEIGHT_STATIONARY);
@@ -370,10 +396,21 @@ TEST_CASE("KernelCompiler compilation statistics", "[kernel_compiler]") {
         REQUIRE(stats.estimated_arithmetic_intensity > 0);
     }
 
+    SECTION("Roofline regime") {
+        // 16x16 systolic array at 64 B/cycle: 512 FLOPs / 64 B
+        REQUIRE(stats.machine_balance == Catch::Approx(8.0));
+        REQUIRE(stats.regime == ExecutionRegime::COMPUTE_BOUND);
+
+        // A vector-matrix product cannot reuse B and is memory-bound
+        compiler.compile_matmul(1, 512, 512);
+        REQUIRE(compiler.last_stats().regime == ExecutionRegime::MEMORY_BOUND);
+    }
+
     SECTION("Summary string") {
         std::string summary = stats.summary();
         REQUIRE(summary.find("Compile Time") != std::string::npos);
         REQUIRE(summary.find("Tile Configuration") != std::string::npos);
+        REQUIRE(summary.find("Regime: compute_bound") != std::string::npos);
     }
 }
 
@@ -407,6 +444,48 @@ TEST_CASE("KernelCompiler tile optimization", "[kernel_compiler]") {
     }
 }
 
+TEST_CASE("KernelCompiler batch compilation", "[kernel_compiler]") {
+    KernelCompiler compiler;
+
+    std::vector<std::array<Size, 3>> shapes = {
+        {64, 64, 64}, {128, 256, 512}, {100, 100, 100}
+    };
+
+    SECTION("Batch matches individual compilation") {
+        auto results = compiler.compile_matmul_many(shapes);
+        REQUIRE(results.size() == shapes.size());
+
+        for (size_t i = 0; i < shapes.size(); ++i) {
+            const auto& [kernel, stats] = results[i];
+            Kernel single = compiler.compile_matmul(shapes[i][0], shapes[i][1], shapes[i][2]);
+
+            REQUIRE(kernel.is_valid());
+            REQUIRE(kernel.M() == shapes[i][0]);
+            REQUIRE(kernel.N() == shapes[i][1]);
+            REQUIRE(kernel.K() == shapes[i][2]);
+            REQUIRE(stats.selected_Ti == compiler.last_stats().selected_Ti);
+            REQUIRE(stats.selected_Tj == compiler.last_stats().selected_Tj);
+            REQUIRE(stats.selected_Tk == compiler.last_stats().selected_Tk);
+            REQUIRE(stats.instruction_count == single.program().instructions.size());
+        }
+    }
+
+    SECTION("Options apply to every shape") {
+        auto results = compiler.compile_matmul_many(shapes, CompileOptions::with_tiles(32, 32, 32));
+
+        for (const auto& [kernel, stats] : results) {
+            REQUIRE_FALSE(stats.used_auto_tiling);
+            REQUIRE(kernel.Ti() == 32);
+            REQUIRE(kernel.Tj() == 32);
+            REQUIRE(kernel.Tk() == 32);
+        }
+    }
+
+    SECTION("Empty batch") {
+        REQUIRE(compiler.compile_matmul_many({}).empty());
+    }
+}
+
 TEST_CASE("KernelCompiler memory hierarchy configuration", "[kernel_compiler]") {
     SECTION("Custom memory hierarchy") {
         TileOptimizer::MemoryHierarchy mem;
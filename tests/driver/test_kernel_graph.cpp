@@ -7,7 +7,11 @@
 #include <sw/kpu/kernel_graph.hpp>
 #include <sw/kpu/kernel.hpp>
 
+#include <algorithm>
+#include <atomic>
+#include <sstream>
 #include <string>
+#include <thread>
 #include <vector>
 
 using namespace sw::kpu;
@@ -43,6 +47,23 @@ TEST_CASE("KernelGraph node management", "[kernel_graph][nodes]") {
         REQUIRE(ids.size() == 3);
     }
 
+    SECTION("Reserve keeps node references stable") {
+        graph.reserve(3, 2);
+        REQUIRE(graph.empty());
+
+        size_t k1 = graph.add_kernel(Kernel::create_matmul(64, 64, 64), "layer1");
+        const KernelNode* first = &graph.get_node(k1);
+        size_t k2 = graph.add_kernel(Kernel::create_matmul(64, 64, 64), "layer2");
+        size_t k3 = graph.add_kernel(Kernel::create_matmul(64, 64, 64), "layer3");
+        graph.add_edge(k1, k2);
+        graph.add_edge(k2, k3);
+
+        // No reallocation happened while filling the reserved capacity
+        REQUIRE(&graph.get_node(k1) == first);
+        REQUIRE(graph.num_nodes() == 3);
+        REQUIRE(graph.num_edges() == 2);
+    }
+
     SECTION("Get non-existent node throws") {
         REQUIRE_THROWS_AS(graph.get_node(999), std::out_of_range);
     }
@@ -109,6 +130,99 @@ TEST_CASE("KernelGraph edge management", "[kernel_graph][edges]") {
         REQUIRE(graph.would_create_cycle(k3, k1));        // k3 -> k1 would create cycle
         REQUIRE(graph.would_create_cycle(k2, k1));        // k2 -> k1 would create cycle
     }
+
+    SECTION("Cycle check on a deep chain") {
+        // Long chains must not depend on recursion depth
+        std::vector<size_t> chain = {k1};
+        for (int i = 0; i < 1000; ++i) {
+            size_t k = graph.add_kernel(Kernel::create_matmul(16, 16, 16));
+            graph.add_edge(chain.back(), k);
+            chain.push_back(k);
+        }
+
+        REQUIRE(graph.would_create_cycle(chain.back(), chain.front()));
+        REQUIRE_FALSE(graph.would_create_cycle(chain.front(), chain.back()));
+        REQUIRE_FALSE(graph.would_create_cycle(k2, k3));
+        // Repeated queries reuse the scratch buffers
+        REQUIRE(graph.would_create_cycle(chain[500], chain[10]));
+    }
+
+    SECTION("Cycle check on a densely connected DAG") {
+        // Fully connect consecutive layers: without memoizing explored
+        // nodes the number of paths grows as width^depth
+        const int width = 8, depth = 12;
+        std::vector<size_t> prev = {k1};
+        for (int d = 0; d < depth; ++d) {
+            std::vector<size_t> layer;
+            for (int w = 0; w < width; ++w) {
+                size_t k = graph.add_kernel(Kernel::create_matmul(16, 16, 16));
+                for (size_t p : prev) graph.add_edge(p, k);
+                layer.push_back(k);
+            }
+            prev = layer;
+        }
+
+        REQUIRE(graph.would_create_cycle(prev.back(), k1));
+        REQUIRE_FALSE(graph.would_create_cycle(k1, prev.back()));
+        REQUIRE_FALSE(graph.would_create_cycle(prev.back(), k2));  // k2 is isolated
+    }
+}
+
+// ============================================================================
+// Bulk Construction Tests
+// ============================================================================
+
+TEST_CASE("KernelGraph bulk construction", "[kernel_graph][edges]") {
+    KernelGraph graph;
+    size_t existing = graph.add_kernel(Kernel::create_matmul(64, 64, 64), "existing");
+
+    auto make_nodes = [] {
+        std::vector<std::pair<Kernel, std::string>> nodes;
+        nodes.emplace_back(Kernel::create_matmul(64, 64, 64), "a");
+        nodes.emplace_back(Kernel::create_matmul(64, 128, 64), "b");
+        nodes.emplace_back(Kernel::create_matmul(64, 64, 128), "");
+        return nodes;
+    };
+
+    SECTION("Edge indices are local to the batch") {
+        auto ids = graph.build_batch(make_nodes(), {{0, 1, "C", "A"}, {1, 2, "C", "A"}});
+
+        REQUIRE(ids == std::vector<size_t>{existing + 1, existing + 2, existing + 3});
+        REQUIRE(graph.num_nodes() == 4);
+        REQUIRE(graph.num_edges() == 2);
+        REQUIRE(graph.get_edge(0).from_node == ids[0]);
+        REQUIRE(graph.get_edge(1).to_node == ids[2]);
+        REQUIRE(graph.get_edge(0).tensor_size_bytes == 64 * 64 * 4);
+        REQUIRE(graph.get_node(ids[2]).name == graph.get_kernel(ids[2]).name());
+        REQUIRE(graph.get_critical_path() == std::vector<size_t>{ids[0], ids[1], ids[2]});
+    }
+
+    SECTION("Invalid batches leave the graph unchanged") {
+        REQUIRE_THROWS_AS(graph.build_batch(make_nodes(), {{0, 3, "C", "A"}}),
+                          std::invalid_argument);
+        REQUIRE_THROWS_AS(graph.build_batch(make_nodes(), {{1, 1, "C", "A"}}),
+                          std::invalid_argument);
+        REQUIRE_THROWS_AS(graph.build_batch(make_nodes(),
+                                            {{0, 1, "C", "A"}, {1, 2, "C", "A"}, {2, 0, "C", "A"}}),
+                          std::invalid_argument);
+
+        REQUIRE(graph.num_nodes() == 1);
+        REQUIRE(graph.num_edges() == 0);
+    }
+
+    SECTION("Edge batches between existing nodes are all-or-nothing") {
+        auto ids = graph.build_batch(make_nodes(), {});
+        auto edge_ids = graph.add_edges({{existing, ids[0], "C", "A"}, {ids[0], ids[1], "C", "A"}});
+        REQUIRE(edge_ids == std::vector<size_t>{0, 1});
+
+        // The cycle closes through an edge already in the graph
+        REQUIRE_THROWS_AS(graph.add_edges({{ids[1], ids[2], "C", "A"}, {ids[1], existing, "C", "A"}}),
+                          std::invalid_argument);
+        REQUIRE_THROWS_AS(graph.add_edges({{ids[1], ids[2], "C", "A"}, {ids[2], 99, "C", "A"}}),
+                          std::invalid_argument);
+        REQUIRE(graph.num_edges() == 2);
+        REQUIRE(graph.outgoing_edges(ids[1]).empty());
+    }
 }
 
 // ============================================================================
@@ -169,6 +283,39 @@ TEST_CASE("KernelGraph properties", "[kernel_graph][properties]") {
         REQUIRE(stats.total_instructions > 0);
         REQUIRE(stats.total_flops > 0);
     }
+
+    SECTION("Stats track nodes and edges as they are added") {
+        Kernel a = Kernel::create_matmul(128, 128, 128);
+        Kernel b = Kernel::create_matmul(128, 256, 128);
+        Kernel c = Kernel::create_matmul(128, 64, 256);
+
+        size_t k1 = graph.add_kernel(a, "layer1");
+        REQUIRE(graph.compute_stats().total_flops == a.total_flops());
+
+        std::vector<std::pair<Kernel, std::string>> batch;
+        batch.emplace_back(b, "layer2");
+        batch.emplace_back(c, "layer3");
+        auto ids = graph.build_batch(std::move(batch), {{0, 1, "C", "A"}});
+        graph.add_edge(k1, ids[0], "C", "A");
+
+        auto stats = graph.compute_stats();
+        REQUIRE(stats.total_flops == a.total_flops() + b.total_flops() + c.total_flops());
+        REQUIRE(stats.total_instructions ==
+                a.instruction_count() + b.instruction_count() + c.instruction_count());
+        REQUIRE(stats.intermediate_bytes == (128 * 128 + 128 * 256) * 4);
+        REQUIRE(stats.avg_arithmetic_intensity == Catch::Approx(
+            (a.arithmetic_intensity() + b.arithmetic_intensity() + c.arithmetic_intensity()) / 3));
+        REQUIRE(stats.max_depth == 2);
+    }
+
+    SECTION("Stats follow a kernel replaced through get_kernel") {
+        size_t k1 = graph.add_kernel(Kernel::create_matmul(64, 64, 64), "layer1");
+        graph.get_kernel(k1) = Kernel::create_matmul(256, 256, 256);
+
+        Size expected = Size{2} * 256 * 256 * 256;
+        REQUIRE(graph.compute_stats().total_flops == expected);
+        REQUIRE(graph.analyze().stats.total_flops == expected);
+    }
 }
 
 // ============================================================================
@@ -261,6 +408,182 @@ TEST_CASE("KernelGraph execution order", "[kernel_graph][execution]") {
         REQUIRE(critical.front() == k1);
         REQUIRE(critical.back() == k5);
     }
+
+    SECTION("Cached traversals are invalidated by mutation") {
+        size_t k1 = graph.add_kernel(Kernel::create_matmul(64, 64, 64), "a");
+        size_t k2 = graph.add_kernel(Kernel::create_matmul(64, 64, 64), "b");
+        graph.add_edge(k1, k2);
+
+        REQUIRE(graph.get_execution_levels().size() == 2);
+        REQUIRE(graph.get_critical_path().size() == 2);
+        REQUIRE(graph.output_nodes() == std::vector<size_t>{k2});
+        REQUIRE(graph.compute_stats().max_depth == 1);
+
+        size_t k3 = graph.add_kernel(Kernel::create_matmul(64, 64, 64), "c");
+        REQUIRE(graph.input_nodes() == std::vector<size_t>{k1, k3});
+        REQUIRE(graph.output_nodes() == std::vector<size_t>{k2, k3});
+
+        graph.add_edge(k2, k3);
+        REQUIRE(graph.get_execution_levels().size() == 3);
+        REQUIRE(graph.get_critical_path() == std::vector<size_t>{k1, k2, k3});
+        REQUIRE(graph.output_nodes() == std::vector<size_t>{k3});
+        REQUIRE(graph.compute_stats().max_depth == 2);
+    }
+
+    SECTION("Concurrent const queries on a fresh graph agree") {
+        // Chain of 32 nodes with a skip edge every 4 nodes
+        std::vector<size_t> ids;
+        for (int i = 0; i < 32; ++i) {
+            ids.push_back(graph.add_kernel(Kernel::create_matmul(32, 32, 32)));
+            if (i > 0) graph.add_edge(ids[i - 1], ids[i]);
+            if (i >= 4 && i % 4 == 0) graph.add_edge(ids[i - 4], ids[i]);
+        }
+
+        // Every thread races to fill the caches and use the BFS scratch
+        constexpr int kThreads = 8;
+        std::vector<std::vector<size_t>> paths(kThreads);
+        std::vector<size_t> depths(kThreads);
+        std::vector<int> cycles(kThreads);
+        std::vector<std::thread> workers;
+        for (int t = 0; t < kThreads; ++t) {
+            workers.emplace_back([&, t] {
+                for (int i = 0; i < 32; ++i) {
+                    cycles[t] += graph.would_create_cycle(ids[31], ids[i]) ? 1 : 0;
+                }
+                paths[t] = graph.get_critical_path();
+                depths[t] = graph.compute_stats().max_depth;
+            });
+        }
+        for (auto& w : workers) w.join();
+
+        for (int t = 0; t < kThreads; ++t) {
+            REQUIRE(paths[t] == ids);
+            REQUIRE(depths[t] == 31);
+            REQUIRE(cycles[t] == 32);
+        }
+    }
+
+    SECTION("Queries running while the graph grows see a consistent graph") {
+        graph.add_kernel(Kernel::create_matmul(32, 32, 32));
+
+        // Readers walk the graph while one writer appends a chain; each
+        // snapshot must be a complete chain of whatever length it saw
+        std::atomic<bool> done{false};
+        std::atomic<int> bad{0};
+        std::vector<std::thread> readers;
+        for (int t = 0; t < 4; ++t) {
+            readers.emplace_back([&] {
+                while (!done.load()) {
+                    auto levels = graph.get_execution_levels();
+                    auto stats = graph.compute_stats();
+                    if (levels.empty() || stats.max_depth + 1 > stats.num_nodes) {
+                        ++bad;
+                    }
+                }
+            });
+        }
+        for (int i = 1; i < 200; ++i) {
+            size_t id = graph.add_kernel(Kernel::create_matmul(32, 32, 32));
+            graph.add_edge(id - 1, id);
+        }
+        done = true;
+        for (auto& r : readers) r.join();
+
+        REQUIRE(bad == 0);
+        REQUIRE(graph.get_critical_path().size() == 200);
+    }
+}
+
+// ============================================================================
+// Single-Pass Analysis Tests
+// ============================================================================
+
+TEST_CASE("KernelGraph single-pass analysis", "[kernel_graph][analysis]") {
+    KernelGraph graph;
+
+    SECTION("Empty graph is invalid") {
+        auto analysis = graph.analyze();
+        REQUIRE_FALSE(analysis.valid);
+        REQUIRE(analysis.error_message == "Graph is empty");
+    }
+
+    SECTION("Matches individual queries") {
+        size_t k1 = graph.add_kernel(Kernel::create_matmul(64, 64, 64), "input");
+        size_t k2 = graph.add_kernel(Kernel::create_matmul(64, 64, 64), "left");
+        size_t k3 = graph.add_kernel(Kernel::create_matmul(64, 64, 64), "right");
+        size_t k4 = graph.add_kernel(Kernel::create_matmul(64, 128, 64), "merge");
+        size_t k5 = graph.add_kernel(Kernel::create_matmul(64, 256, 128), "output");
+
+        graph.add_edge(k1, k2);
+        graph.add_edge(k1, k3);
+        graph.add_edge(k2, k4, "C", "A");
+        graph.add_edge(k3, k4, "C", "B");
+        graph.add_edge(k4, k5);
+
+        auto analysis = graph.analyze();
+        REQUIRE(analysis.valid);
+        REQUIRE(analysis.error_message.empty());
+
+        auto order = analysis.execution_order;
+        REQUIRE(order.size() == 5);
+        auto pos = [&](size_t id) {
+            return std::find(order.begin(), order.end(), id) - order.begin();
+        };
+        REQUIRE(pos(k1) < pos(k2));
+        REQUIRE(pos(k1) < pos(k3));
+        REQUIRE(pos(k3) < pos(k4));
+        REQUIRE(pos(k4) < pos(k5));
+
+        REQUIRE(analysis.execution_levels == graph.get_execution_levels());
+
+        REQUIRE(analysis.fusible_pairs == graph.find_fusible_pairs());
+
+        auto stats = graph.compute_stats();
+        REQUIRE(analysis.stats.num_nodes == stats.num_nodes);
+        REQUIRE(analysis.stats.num_edges == stats.num_edges);
+        REQUIRE(analysis.stats.num_input_nodes == stats.num_input_nodes);
+        REQUIRE(analysis.stats.num_output_nodes == stats.num_output_nodes);
+        REQUIRE(analysis.stats.max_depth == stats.max_depth);
+        REQUIRE(analysis.stats.total_instructions == stats.total_instructions);
+        REQUIRE(analysis.stats.total_flops == stats.total_flops);
+        REQUIRE(analysis.stats.intermediate_bytes == stats.intermediate_bytes);
+        REQUIRE(analysis.stats.avg_arithmetic_intensity ==
+                Catch::Approx(stats.avg_arithmetic_intensity));
+    }
+
+    SECTION("Fusible pairs are ordered by producer id") {
+        // Chain 2 -> 1 -> 0: execution order visits producer 2 first
+        for (int i = 0; i < 3; ++i) {
+            graph.add_kernel(Kernel::create_matmul(64, 64, 64));
+        }
+        graph.add_edge(2, 1);
+        graph.add_edge(1, 0);
+
+        auto analysis = graph.analyze();
+        REQUIRE(analysis.valid);
+        using Pairs = std::vector<std::pair<size_t, size_t>>;
+        REQUIRE(analysis.fusible_pairs == Pairs{{1, 0}, {2, 1}});
+        REQUIRE(analysis.fusible_pairs == graph.find_fusible_pairs());
+    }
+
+    SECTION("Invalid kernel leaves only the error") {
+        size_t k1 = graph.add_kernel(Kernel::create_matmul(64, 64, 64));
+        size_t k2 = graph.add_kernel(Kernel::create_matmul(64, 64, 64));
+        size_t k3 = graph.add_kernel(Kernel::create_matmul(64, 64, 64));
+        graph.add_edge(k1, k2);
+        graph.add_edge(k2, k3);
+        graph.get_kernel(k3) = Kernel{};
+
+        auto analysis = graph.analyze();
+        REQUIRE_FALSE(analysis.valid);
+        REQUIRE(analysis.error_message.find("invalid kernel") != std::string::npos);
+        REQUIRE(analysis.execution_order.empty());
+        REQUIRE(analysis.execution_levels.empty());
+        REQUIRE(analysis.fusible_pairs.empty());
+        REQUIRE(analysis.shared_input_groups.empty());
+        REQUIRE(analysis.stats.num_nodes == 0);
+        REQUIRE(analysis.stats.total_flops == 0);
+    }
 }
 
 // ============================================================================
@@ -315,6 +638,25 @@ TEST_CASE("KernelGraph fusion", "[kernel_graph][fusion]") {
         REQUIRE_FALSE(graph.can_fuse(k2, k3));
     }
 
+    SECTION("Cannot fuse - multiple consumers") {
+        size_t k1 = graph.add_kernel(Kernel::create_matmul(64, 128, 64), "input");
+        size_t k2 = graph.add_kernel(Kernel::create_matmul(64, 256, 128), "left");
+        size_t k3 = graph.add_kernel(Kernel::create_matmul(64, 256, 128), "right");
+        size_t k4 = graph.add_kernel(Kernel::create_matmul(64, 64, 256), "tail");
+
+        graph.add_edge(k1, k2);
+        graph.add_edge(k1, k3);
+        graph.add_edge(k3, k4);
+
+        // k1's output is read twice, so it must be materialized
+        REQUIRE_FALSE(graph.can_fuse(k1, k2));
+        REQUIRE_FALSE(graph.can_fuse(k1, k3));
+
+        auto fusible = graph.find_fusible_pairs();
+        REQUIRE(fusible == std::vector<std::pair<size_t, size_t>>{{k3, k4}});
+        REQUIRE(graph.analyze().fusible_pairs == fusible);
+    }
+
     SECTION("Mark for fusion") {
         size_t k1 = graph.add_kernel(Kernel::create_matmul(64, 128, 64), "layer1");
         size_t k2 = graph.add_kernel(Kernel::create_matmul(64, 256, 128), "layer2");
@@ -329,6 +671,37 @@ TEST_CASE("KernelGraph fusion", "[kernel_graph][fusion]") {
         REQUIRE_FALSE(graph.get_node(k1).is_fused);
         REQUIRE_FALSE(graph.get_node(k2).is_fused);
     }
+
+    SECTION("Shared-input sibling GEMMs") {
+        //        k1
+        //      /  |  \
+        //    k2   k3   k4 (different K)
+        size_t k1 = graph.add_kernel(Kernel::create_matmul(64, 64, 128), "input");
+        size_t k2 = graph.add_kernel(Kernel::create_matmul(64, 128, 64), "gate");
+        size_t k3 = graph.add_kernel(Kernel::create_matmul(64, 256, 64), "up");
+        size_t k4 = graph.add_kernel(Kernel::create_matmul(64, 128, 32), "other");
+
+        graph.add_edge(k1, k2, "C", "A");
+        graph.add_edge(k1, k3, "C", "A");
+        graph.add_edge(k1, k4, "C", "A");
+
+        auto groups = graph.find_shared_input_groups();
+        REQUIRE(groups.size() == 1);
+        REQUIRE(groups[0] == std::vector<size_t>{k2, k3});
+
+        REQUIRE(graph.analyze().shared_input_groups == groups);
+    }
+
+    SECTION("Siblings reading the input as B are not grouped") {
+        size_t k1 = graph.add_kernel(Kernel::create_matmul(64, 64, 128), "input");
+        size_t k2 = graph.add_kernel(Kernel::create_matmul(64, 128, 64), "left");
+        size_t k3 = graph.add_kernel(Kernel::create_matmul(64, 128, 64), "right");
+
+        graph.add_edge(k1, k2, "C", "A");
+        graph.add_edge(k1, k3, "C", "B");
+
+        REQUIRE(graph.find_shared_input_groups().empty());
+    }
 }
 
 // ============================================================================
@@ -405,6 +778,84 @@ TEST_CASE("KernelGraph compilation", "[kernel_graph][compile]") {
     }
 }
 
+TEST_CASE("KernelGraph structural hash and compile cache", "[kernel_graph][compile]") {
+    auto build = [](const std::string& name, size_t n) {
+        KernelGraph graph(name);
+        size_t k1 = graph.add_kernel(Kernel::create_matmul(64, n, 64), "layer1");
+        size_t k2 = graph.add_kernel(Kernel::create_matmul(64, 64, n), "layer2");
+        graph.add_edge(k1, k2);
+        return graph;
+    };
+
+    KernelGraph::clear_compile_cache();
+
+    SECTION("Hash ignores names but not structure") {
+        KernelGraph a = build("a", 128);
+        KernelGraph b = build("b", 128);
+        KernelGraph c = build("c", 256);
+
+        REQUIRE(a.structural_hash() == b.structural_hash());
+        REQUIRE(a.structural_hash() != c.structural_hash());
+
+        KernelGraph unconnected("d");
+        unconnected.add_kernel(Kernel::create_matmul(64, 128, 64), "layer1");
+        unconnected.add_kernel(Kernel::create_matmul(64, 64, 128), "layer2");
+        REQUIRE(a.structural_hash() != unconnected.structural_hash());
+    }
+
+    SECTION("Hash changes when the graph changes") {
+        KernelGraph graph = build("g", 128);
+        uint64_t before = graph.structural_hash();
+
+        graph.add_kernel(Kernel::create_matmul(64, 64, 64), "layer3");
+
+        REQUIRE(graph.structural_hash() != before);
+    }
+
+    SECTION("Identical graphs reuse the compiled program") {
+        KernelGraph first = build("first", 128);
+        KernelGraph second = build("second", 128);
+
+        auto r1 = first.compile();
+        auto r2 = second.compile();
+
+        REQUIRE(r1.success);
+        REQUIRE(r2.success);
+        REQUIRE(r1.execution_order == r2.execution_order);
+        REQUIRE(r1.program.instructions.size() == r2.program.instructions.size());
+        REQUIRE(r1.program.name == "first");
+        REQUIRE(r2.program.name == "second");
+    }
+
+    SECTION("Modified graph is recompiled") {
+        KernelGraph graph = build("g", 128);
+        REQUIRE(graph.compile().execution_order.size() == 2);
+
+        graph.add_kernel(Kernel::create_matmul(64, 64, 64), "layer3");
+
+        REQUIRE(graph.compile().execution_order.size() == 3);
+    }
+
+    SECTION("Program edited in place is recompiled") {
+        KernelGraph graph = build("g", 128);
+        REQUIRE(graph.compile().success);
+        uint64_t before = graph.structural_hash();
+
+        // Same shape and instruction count, different instruction contents
+        Kernel& kernel = graph.get_kernel(0);
+        isa::DMProgram program = kernel.program();
+        program.instructions.front().label = "edited";
+        kernel.set_program(std::move(program));
+
+        REQUIRE(graph.structural_hash() != before);
+        auto result = graph.compile();
+        REQUIRE(result.success);
+        REQUIRE(std::any_of(result.program.instructions.begin(),
+                            result.program.instructions.end(),
+                            [](const isa::DMInstruction& instr) { return instr.label == "edited"; }));
+    }
+}
+
 // ============================================================================
 // Visualization Tests
 // ============================================================================
@@ -435,6 +886,13 @@ TEST_CASE("KernelGraph visualization", "[kernel_graph][viz]") {
         REQUIRE(dot.find("fc2") != std::string::npos);
         REQUIRE(dot.find("->") != std::string::npos);
     }
+
+    SECTION("DOT streamed to an ostream") {
+        std::ostringstream oss;
+        graph.write_dot(oss, true);
+
+        REQUIRE(oss.str() == graph.to_dot(true));
+    }
 }
 
 // ============================================================================
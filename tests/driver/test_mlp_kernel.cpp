@@ -269,6 +269,29 @@ TEST_CASE("KernelCompiler compile_mlp", "[kernel_compiler][mlp]") {
         REQUIRE(stats.instruction_count > 0);
         REQUIRE(stats.estimated_arithmetic_intensity > 0);
     }
+
+    SECTION("Activation sweep matches individual compilation") {
+        std::vector<ActivationType> activations = {
+            ActivationType::RELU,
+            ActivationType::GELU,
+            ActivationType::NONE
+        };
+
+        auto kernels = compiler.compile_mlp_activation_sweep(128, 256, 64, activations, true);
+        REQUIRE(compiler.last_succeeded());
+        REQUIRE(kernels.size() == activations.size());
+
+        for (size_t i = 0; i < activations.size(); ++i) {
+            Kernel single = compiler.compile_mlp(128, 256, 64, activations[i], true);
+
+            REQUIRE(kernels[i].is_valid());
+            REQUIRE(kernels[i].op_type() == KernelOpType::MLP);
+            REQUIRE(kernels[i].activation() == activations[i]);
+            REQUIRE(kernels[i].has_bias());
+            REQUIRE(kernels[i].name() == single.name());
+            REQUIRE(kernels[i].instruction_count() == single.instruction_count());
+        }
+    }
 }
 
 // ============================================================================